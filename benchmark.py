@@ -0,0 +1,147 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Script: benchmark.py
+#
+#   Benchmarks for the processing steps of the other scripts
+#   on synthetic data -- unlike the other scripts this script
+#   is run directly and does not need a project:
+#
+#   python benchmark.py <benchmark> [<number of tweets>]
+#
+#   Available benchmarks:
+#
+#   - normalize: throughput (tweets per second) of the text
+#     normaliser in 'cleaner.py' against the original chain of
+#     steps in 'clean.py' on a synthetic corpus of tweets (one
+#     million by default) -- also checks both give the same
+#     text for every tweet
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import sys
+import time
+import random
+import string
+import re
+import cleaner
+
+#
+# Words and other pieces of text to build synthetic tweets from --
+# a mix of plain words, capitals, numbers, punctuation, mentions,
+# hashtags, URLs, non-English characters and line breaks
+#
+
+PIECES = ['the', 'and', 'vaccine', 'people', 'today', 'great', 'news', 'thank', 'you', 'we',
+          'are', 'working', 'together', 'for', 'a', 'better', 'future', 'Europe', 'COVID19',
+          'Thanks!', 'isn\'t', 'we\'re', '2021', '100%', '#climate', '#EU', '@user', '@another_user',
+          'https://t.co/AbC123xyz', 'http://example.com/path?q=1', '—', 'café', 'naïve', '🙂',
+          '...', '(see', 'below)', '"quoted"', 'RT', '&amp;', '\n', 'Q&A:', 'e-mail', '3pm']
+
+#
+# Utility function to build a synthetic corpus of tweets
+#
+# The function takes one argument:
+#
+# count: the number of tweets to build
+#
+# The function returns a list of tweet texts -- the same seed
+# is used every time so runs are comparable
+#
+
+def synthetic_tweets(count):
+
+    rng = random.Random(2021)
+
+    return [' '.join(rng.choices(PIECES, k=rng.randint(5, 40))) for i in range(count)]
+
+#
+# The original chain of steps used by 'clean.py' to cleanse the
+# text of a tweet -- kept here to benchmark against
+#
+
+def remove_url(txt):
+
+    return " ".join(re.sub("([^0-9A-Za-z \t])|(\\w+:\\/\\/\\S+)", "", txt).split())
+
+def original_chain(txt):
+
+    text = remove_url(txt)
+    text = "".join([char for char in text if char not in string.punctuation])
+    text = re.sub('[0-9]+', '', text)
+
+    return text.lower()
+
+#
+# Utility function to time a function over every tweet
+#
+# The function returns a tuple of the results and the time
+# taken in seconds
+#
+
+def time_function(function, tweets):
+
+    start = time.perf_counter()
+    results = [function(tweet) for tweet in tweets]
+
+    return results, time.perf_counter() - start
+
+#
+# Benchmark the text normaliser
+#
+
+def benchmark_normalize(count):
+
+    print('Building ' + str(count) + ' synthetic tweets')
+
+    tweets = synthetic_tweets(count)
+
+    original, original_time = time_function(original_chain, tweets)
+    normalized, normalized_time = time_function(cleaner.normalize, tweets)
+
+    print('original chain: {:.1f}s, {:,.0f} tweets per second'.format(original_time, count / original_time))
+    print('normalize:      {:.1f}s, {:,.0f} tweets per second'.format(normalized_time, count / normalized_time))
+    print('speed up:       {:.2f}x'.format(original_time / normalized_time))
+    print('same output:    ' + str(original == normalized))
+
+#
+# Get the benchmark to run and the number of tweets and run it
+#
+
+benchmarks = {'normalize': benchmark_normalize}
+
+if len(sys.argv) < 2 or sys.argv[1] not in benchmarks:
+    print('Usage: python benchmark.py <benchmark> [<number of tweets>]')
+    print('Benchmarks: ' + ', '.join(benchmarks))
+    sys.exit(1)
+
+benchmarks[sys.argv[1]](int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
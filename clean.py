@@ -39,6 +39,33 @@
 #
 #   - lemmas: A lemmatised list of terms in the tweet
 #
+#   The same tweets are also written to a columnar tweet store
+#   in 'analysis/store' (see 'store.py') which the analysis
+#   scripts read from
+#
+#   Every raw file cleaned is recorded (name, size, modification
+#   time and content hash) in 'manifest.json' in the 'cleaned'
+#   subdirectory -- with the 'incremental' option only raw files
+#   which are new or have changed since the last run are cleaned
+#   and the cleansed files of the others are reused
+#
+#   The manifest also records a hash of the settings the files
+#   were cleansed with (the stopwords and the cleaner and
+#   lemmatiser versions) -- if they have changed every file is
+#   cleaned again
+#
+#   Each file's cleansed tweets are also kept as lists of words
+#   in the 'cache/cleaned' subdirectory so a reused file's
+#   tweets go into the tweet store without parsing its CSV again
+#
+#   Lemmas are cached in 'lemmas.json' in the base directory
+#   (shared by all projects) so each word is only passed to the
+#   lemmatiser once
+#
+#   With the 'workers' option raw files are cleansed in parallel
+#   by that many worker processes (see 'cleaner.py') -- the
+#   output is the same as cleaning them one after another
+#
 #   Typically this script should run immediately after
 #   scraping tweets with 'init.py' or 'scrape.py'
 #
@@ -70,13 +97,20 @@
 #
 ################################################################
 
-import string
 import re
 import csv
 import os
-import nltk
-from nltk.corpus import stopwords
+import ast
+import json
+import pickle
+import shutil
+import hashlib
+import cleaner
+import parallel
+import store
+import cubes
 import config
+import files
 
 #
 # Define paths for raw CSV files and cleansed CSV files.
@@ -88,238 +122,358 @@ import config
 # The 'analysis' subdirectory stores various data files generated
 # in the analysis process including generated graphs etc
 #
+# The 'cache' subdirectory stores data kept between runs to save
+# work (it is created when first needed)
+#
 
 rawpath = config.basepath + project['key'] + '/raw/'
 cleanpath = config.basepath + project['key'] + '/cleaned/'
 analysispath = config.basepath + project['key'] + '/analysis/'
+cachepath = config.basepath + project['key'] + '/cache/'
+rowspath = cachepath + 'cleaned/'
 
 #
-# Utility function to remove URL from text
-#
-# We use a regular express to perform the URL removal
+# Utility function to calculate the SHA-256 hash of a file's
+# content
 #
 # The function takes one argument:
 #
-# txt: A string of text to perform URL removal on
+# path: the path of the file to hash
 #
-# The function returns a string containing the source
-# string after URLs have been removed
+# The function returns the hash as a string of hex digits
 #
 
-def remove_url(txt):
+def file_hash(path):
+
+    sha = hashlib.sha256()
 
-    return " ".join(re.sub("([^0-9A-Za-z \t])|(\w+:\/\/\S+)", "", txt).split())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
 
+    return sha.hexdigest()
 
 #
-# Download stopwords from NLTK -- we are using the standard
-# NLTK English stopwords list
+# Utility function to check if a raw file needs cleaning
+#
+# The function takes two arguments:
+#
+# filename: the name of the raw file
+#
+# manifest: the manifest of raw files processed by earlier runs
+#
+# The file needs cleaning if it is not in the manifest, its
+# cleansed file is missing, or its content has changed -- we
+# only calculate the hash if the size or modification time has
+# changed
+#
+# The function returns a tuple of whether the file needs
+# cleaning and the file's manifest entry (name, size,
+# modification time and hash)
 #
 
-stopwords_en = stopwords.words('english')
+def raw_changed(filename, manifest):
 
+    info = os.stat(rawpath + filename)
+    entry = {'name': filename, 'size': info.st_size, 'mtime': info.st_mtime}
+
+    previous = manifest.get(filename)
+
+    if previous is None or os.path.exists(cleanpath + filename) == False:
+        entry['sha256'] = file_hash(rawpath + filename)
+        return True, entry
+
+    if previous['size'] == entry['size'] and previous['mtime'] == entry['mtime']:
+        entry['sha256'] = previous['sha256']
+        return False, entry
+
+    entry['sha256'] = file_hash(rawpath + filename)
+
+    return entry['sha256'] != previous['sha256'], entry
+
+#
+# Utility function to keep a file's cleansed tweets in the
+# 'cache/cleaned' subdirectory
 #
-# Add custom stopwords to the stop word list
+# The function takes three arguments:
 #
+# filename: the name of the raw file
+#
+# entry: the file's manifest entry
+#
+# rows: the file's cleansed tweets (as returned by
+# 'cleaner.clean_file')
+#
+# The tweets are saved with the raw file's hash and the cleaning
+# settings so they are only used for the same file cleansed the
+# same way
+#
+
+def save_rows(filename, entry, rows):
+
+    os.makedirs(rowspath, exist_ok=True)
 
-for stopword in project['stopwords']:
-    stopwords_en.append(stopword)
+    files.write_binary(rowspath + filename + '.pickle',
+                       lambda f: pickle.dump({'sha256': entry['sha256'], 'settings': settings, 'rows': rows},
+                                             f, protocol=pickle.HIGHEST_PROTOCOL))
 
 #
-# Download and instantiate the NLTK WordNet lemmatiser
+# Utility function to get a reused file's cleansed tweets
 #
+# The function takes two arguments:
+#
+# filename: the name of the raw file
+#
+# entry: the file's manifest entry
+#
+# The tweets are loaded from the 'cache/cleaned' subdirectory if
+# they are there (and match the file and settings) otherwise they
+# are read back from the cleansed CSV -- the lists of words were
+# written as Python lists so we parse them back into lists -- and
+# saved for next time
+#
+# The function returns the list of cleansed tweets
+#
+
+def load_rows(filename, entry):
+
+    if os.path.exists(rowspath + filename + '.pickle'):
+
+        with open(rowspath + filename + '.pickle', 'rb') as f:
+            saved = pickle.load(f)
+
+        if saved['sha256'] == entry['sha256'] and saved['settings'] == settings:
+            return saved['rows']
+
+    with open(cleanpath + filename, newline='') as fi:
+
+        reader = csv.reader(fi)
+        next(reader) # Skip the header row
+
+        rows = [row[:3] + [ast.literal_eval(words) for words in row[3:]] for row in reader]
+
+    save_rows(filename, entry, rows)
+
+    return rows
 
-nltk.download('wordnet')
-wn = nltk.WordNetLemmatizer()
 
 #
-# Open 'alltweets.csv' in the analysis directory to hold
-# the complete set of cleansed tweets ready for analysis
+# Get the stopwords -- we are using the standard NLTK English
+# stopwords list plus the project's custom stopwords (cached in
+# the project's 'cache' subdirectory)
 #
+
+stopwords_en = cleaner.get_stopwords(project, cachepath + 'stopwords.json')
+
+#
+# Load the lemma cache shared by all projects from 'lemmas.json' in
+# the base directory -- words already in the cache are not passed to
+# the lemmatiser again (and if every word is in the cache WordNet is
+# never loaded)
 #
 
-with open(analysispath + 'alltweets.csv', 'w') as f:
+lemmafile = config.basepath + 'lemmas.json'
 
-    allwriter = csv.writer(f)
-    allwriter.writerow(['tweet_id', 'created_at', 'text', 'words', 'stopwords', 'lemmas'])
+cleaner.load_lemma_cache(lemmafile)
 
-    #
-    # Get list of raw CSV files and sort alphanumerically
-    #
+#
+# Check if we are only cleaning new or changed raw files
+#
 
-    filelist = os.listdir(rawpath) # Get all files in target directory
-    filelist.sort() # Sort files alphanumerically
+incremental = options.get('incremental', False)
 
-    #
-    # Loop through file list and and cleanse each raw file
-    #
+#
+# Get the number of worker processes to use to cleanse raw files
+# in parallel (one by default)
+#
 
-    for filename in filelist:
+workers = int(options.get('workers', 1))
 
-        #
-        # Make sure it is a CSV file (just in case)
-        #
+#
+# Work out a hash of the settings the raw files are cleansed with --
+# the stopwords and the versions of the cleaner and lemmatiser
+#
 
-        if re.search('\.csv$', filename): # Check if file name is .csv
+settings = hashlib.sha256(json.dumps({'stopwords': sorted(stopwords_en),
+                                      'cleaner': cleaner.CLEANER_VERSION,
+                                      'lemmatiser': cleaner.LEMMA_VERSION}).encode('utf-8')).hexdigest()
 
-            #
-            # Determine file name for cleansed CSV output file
-            #
+#
+# Load the manifest of raw files processed by earlier runs from
+# 'manifest.json' in the 'cleaned' subdirectory -- it records the
+# name, size, modification time and content hash of every raw file
+# cleaned so we can tell which files are new or have changed
+#
+# If the files were cleansed with other settings (or by a version of
+# this script which didn't record them) we start with an empty
+# manifest so every file is cleaned again
+#
 
-            cleanfile = cleanpath + filename
+manifestfile = cleanpath + 'manifest.json'
 
-            #
-            # Output some info for the user to keep them posted on progress
-            #
+manifest = {}
 
-            print('Processing file: ' + filename)
+if os.path.exists(manifestfile):
 
-            #
-            # Create empty objects to hold a list of tweet text and tweet
-            # creation dates
-            #
+    with open(manifestfile) as f:
+        saved = json.load(f)
 
-            tweets = {}
-            tweets_dates = {}
+    if saved.get('settings') == settings:
+        manifest = saved['files']
+    elif incremental:
+        print('Stopwords or cleaner settings have changed -- cleaning every file')
 
-            #
-            # Open the raw CSV file for reading
-            #
+#
+# Create a new manifest for this run -- files no longer in 'raw'
+# drop out of it
+#
 
-            with open(rawpath + filename, newline='') as csvfile:
+newmanifest = {}
 
-                #
-                # Create a CSV DictReader to read the file
-                #
+#
+# Get list of raw CSV files and sort alphanumerically
+#
+# Make sure we only include CSV files (just in case)
+#
+
+filelist = os.listdir(rawpath) # Get all files in target directory
+filelist.sort() # Sort files alphanumerically
+
+filelist = [filename for filename in filelist if re.search('\.csv$', filename)] # Check if file name is .csv
+
+#
+# Work out which files need cleansing -- every file unless we are
+# only cleaning new or changed files -- and record every file in
+# the new manifest
+#
 
-                reader = csv.DictReader(csvfile)
+toclean = []
 
-                #
-                # Loop through rows in the CSV and read in the tweet text and dates
-                # Using the Tweet ID as the keys in the 'tweets' and 'tweet_dates'
-                # objects
-                #
+for filename in filelist:
+
+    changed, newmanifest[filename] = raw_changed(filename, manifest)
+
+    if incremental == False or changed:
+        toclean.append(filename)
+
+#
+# Cleanse the files -- in parallel if we have more than one worker
+#
+# Each file's cleansed tweets are written to the matching CSV in the
+# 'cleaned' subdirectory and returned as a list of rows along with
+# the words newly lemmatised
+#
 
-                for row in reader:
-                    tweets[row['tweet_id']] = row['text']
-                    tweets_dates[row['tweet_id']] = row['created_at']
+results = parallel.starmap(cleaner.clean_file,
+                           [(rawpath + filename, cleanpath + filename, stopwords_en) for filename in toclean],
+                           workers=workers)
 
-            #
-            # Create empty objects to hold various processed data:
-            #
-            # tweet_lemmas: holds lemmas of words in a tweet
-            # tweet_words: holds list of words in a tweet
-            # tweet_clean: holds cleansed text of tweets
-            # tweet_stopwords: holds cleansed text of tweets without stopwords
-            #
-            # The tweet ID will be the key in each object
-            #
+cleaned = {}
 
-            tweet_lemmas = {}
-            tweet_words = {}
-            tweet_clean = {}
-            tweet_stopwords = {}
+for filename, (rows, lemmas) in zip(toclean, results):
+    cleaned[filename] = rows
+    cleaner.lemma_cache.update(lemmas)
+    save_rows(filename, newmanifest[filename], rows)
 
-            #
-            # Loop through every tweet to perform a whole bunch of work
-            #
+#
+# Remove the kept tweets of files no longer in 'raw'
+#
 
-            for tweet_id in tweets:
+if os.path.exists(rowspath):
+    for filename in os.listdir(rowspath):
+        if filename[:-len('.pickle')] not in newmanifest:
+            os.remove(rowspath + filename)
 
-                #
-                # Get the tweet's text and remove URLs
-                #
+#
+# Save the lemma cache with any words newly lemmatised
+#
 
-                text = remove_url(tweets[tweet_id])
+cleaner.save_lemma_cache(lemmafile)
 
-                #
-                # Strip out punctuation by iterating through each character
-                # and making sure it isn't in a standard list of punctuation
-                #
+#
+# Create a list to hold every cleansed tweet so we can also write
+# them to the project's tweet store once all files are processed
+#
 
-                text = "".join([char for char in text if char not in string.punctuation]) # Strip punctuation
+allrows = []
 
-                #
-                # Remove numbers from the tweet text
-                #
+#
+# Open 'alltweets.csv' in the analysis directory to hold
+# the complete set of cleansed tweets ready for analysis
+#
+# The files are merged in the same sorted order whether or not they
+# were cleansed in parallel so the output is always the same
+#
 
-                text = re.sub('[0-9]+', '', text) # For the time being we don't want to remove numbers
+with open(analysispath + 'alltweets.csv', 'w') as f:
 
-                #
-                # Standardise the text to lowercase
-                #
+    allwriter = csv.writer(f)
+    allwriter.writerow(['tweet_id', 'created_at', 'text', 'words', 'stopwords', 'lemmas'])
 
-                text = text.lower()
+    #
+    # Loop through file list and add each file's cleansed tweets
+    #
 
-                #
-                # Store the cleansed text in tweet_clean
-                #
+    for filename in filelist:
 
-                tweet_clean[tweet_id] = text
+        #
+        # If the file was cleansed in this run, write out its rows into
+        # the 'alltweets.csv' file and keep them for the tweet store
+        #
 
-                #
-                # Store the list of words in the tweet in tweet_words
-                #
-                # We get the list of words by just using split() to
-                # split into words
-                #
+        if filename in cleaned:
 
-                tweet_words[tweet_id] = text.split()
+            for row in cleaned[filename]:
+                allwriter.writerow(row)
+                allrows.append(row)
 
-                #
-                # Store the list of words without stopwords in tweet_stopwords
-                #
-                # We remove stopwords by iterating through each word in tweet_words
-                # and comparing to the list of NLTK stopwords we downloaded
-                #
+            continue
 
-                tweet_stopwords[tweet_id] = [word for word in tweet_words[tweet_id] if word not in stopwords_en]
+        #
+        # Otherwise reuse the cleansed file from the last run -- its lines
+        # are copied into 'alltweets.csv' as they are and its kept rows
+        # are added to the tweet store
+        #
 
-                #
-                # Define an empty list in tweet_lemmas for the list of lemmatised words
-                # in the tweet
-                #
+        print('Reusing cleaned file: ' + filename)
 
-                tweet_lemmas[tweet_id] = []
+        with open(cleanpath + filename, newline='') as fi:
 
-                #
-                # Loop through the list of words (excluding stopwords) and add
-                # the lemmatised word to the list in tweet_lemmas
-                #
-                # We lemmatise the word with the lemmatiser we instantiated earlier
-                # in 'wn'
-                #
-                # append() is used to add each lemmatised term to the list
-                #
+            fi.readline() # Skip the header row
 
-                for word in tweet_stopwords[tweet_id]:
-                    tweet_lemmas[tweet_id].append(wn.lemmatize(word))
+            shutil.copyfileobj(fi, f)
 
-            #
-            # Open the matching CSV in the 'cleaned" subdirectory for writing
-            #
+        allrows.extend(load_rows(filename, newmanifest[filename]))
 
-            with open(cleanfile, 'w') as fi:
+#
+# Write the cleansed tweets to the project's tweet store in the
+# 'analysis/store' subdirectory -- the analysis scripts read the
+# columns they need from here (with real lists of words and parsed
+# dates) rather than parsing 'alltweets_dedup.csv' again
+#
 
-                #
-                # Prepare to write to the file with the CSV module
-                #
+print('Writing tweet store')
 
-                writer = csv.writer(fi)
-                writer.writerow(['tweet_id', 'created_at', 'text', 'words', 'stopwords', 'lemmas'])
+store.write_store(analysispath + 'store/', allrows)
 
-                #
-                #   Loop through tweet_clean to get each tweet and write
-                #   out all six data points
-                #
+#
+# Update the per-month lemma and term frequency tables used by
+# 'wordcount.py' and 'tfidf.py' in the 'cache/cubes' subdirectory --
+# when only cleaning new or changed files we only need to count the
+# months of the tweets in those files again (and any month whose
+# tweets are otherwise different) rather than every month
+#
 
-                for tweet_id in tweet_clean:
-                    writer.writerow([tweet_id, tweets_dates[tweet_id], tweet_clean[tweet_id], tweet_words[tweet_id], tweet_stopwords[tweet_id], tweet_lemmas[tweet_id]])
+if incremental:
+    months = sorted(set(row[1][:7] for filename in cleaned for row in cleaned[filename]))
+else:
+    months = None
 
+cubes.update_cubes(analysispath, cachepath + 'cubes/', months)
 
-            # Loop through tweet_clean again and this time write out
-            # rows into the 'alltweets.csv' file for our merged tweet file
-            #
+#
+# Save the manifest of raw files processed
+#
 
-            for tweet_id in tweet_clean:
-                allwriter.writerow([tweet_id, tweets_dates[tweet_id], tweet_clean[tweet_id], tweet_words[tweet_id], tweet_stopwords[tweet_id], tweet_lemmas[tweet_id]])
+with open(manifestfile, 'w') as f:
+    json.dump({'settings': settings, 'files': newmanifest}, f, indent=1)
@@ -0,0 +1,455 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: cleaner.py
+#
+#   Tweet cleansing used by 'clean.py' -- cleanses one raw
+#   tweet .csv file at a time and writes the cleansed file to
+#   the 'cleaned' subdirectory
+#
+#   The work is kept in this module (rather than in 'clean.py')
+#   so that raw files can be cleansed in parallel by worker
+#   processes
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   The approach taken in this module (and some parts of the
+#   code) are based on class lectures and notes from the
+#   CEU Digital Tools course for BA students in the 2020-21
+#   academic year.
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import string
+import re
+import csv
+import json
+import nltk
+import files
+from nltk.corpus import stopwords
+
+#
+# The NLTK WordNet lemmatiser -- created the first time it is
+# needed in each process
+#
+
+wn = None
+
+#
+# Lemma cache -- a dictionary of words and their lemmas which
+# we check before calling the lemmatiser since most words in
+# tweets are words we have seen (and lemmatised) before
+#
+# lemma_cache: all the words and lemmas we know
+#
+# lemma_added: the words lemmatised since the cache was loaded
+# or (in 'clean_file') since the current file was started
+#
+
+lemma_cache = {}
+lemma_added = {}
+
+#
+# Version of the lemmatiser -- the cache is only used if it was
+# saved with the same version so a new version of NLTK (and its
+# WordNet data) starts with an empty cache
+#
+
+LEMMA_VERSION = 'nltk-' + nltk.__version__
+
+#
+# Version of the cleansing steps -- change this whenever
+# 'normalize' or 'clean_file' change what they write so cleansed
+# files from earlier runs are not reused (see 'clean.py')
+#
+
+CLEANER_VERSION = 1
+
+#
+# Utility function to get the NLTK WordNet lemmatiser
+#
+# The WordNet data is only downloaded (which needs the network) if
+# it isn't already installed, and only once a word is missing from
+# the lemma cache
+#
+
+def get_lemmatizer():
+
+    global wn
+
+    if wn is None:
+
+        try:
+            nltk.data.find('corpora/wordnet')
+        except LookupError:
+            nltk.download('wordnet')
+
+        wn = nltk.WordNetLemmatizer()
+
+    return wn
+
+#
+# Get the stopwords for a project
+#
+# The function takes two arguments:
+#
+# project: the project object (with the project's custom
+# stopwords in 'stopwords')
+#
+# cachefile: the path of the project's stopword cache file
+#
+# The stopwords are the standard NLTK English stopwords plus the
+# project's custom stopwords -- they are saved in the cache file
+# the first time and loaded from there afterwards (as long as
+# the project's custom stopwords and NLTK version haven't
+# changed) so NLTK's stopword data is only read once
+#
+# The function returns the stopwords as a frozenset so checking
+# whether a word is a stopword takes the same time however many
+# stopwords there are
+#
+
+def get_stopwords(project, cachefile):
+
+    version = 'nltk-' + nltk.__version__
+    custom = list(project['stopwords'])
+
+    if os.path.exists(cachefile):
+
+        with open(cachefile) as f:
+            cache = json.load(f)
+
+        if cache['version'] == version and cache['project'] == custom:
+            return frozenset(cache['stopwords'])
+
+    #
+    # Build the stopwords and save them in the cache
+    #
+
+    words = frozenset(stopwords.words('english')) | frozenset(custom)
+
+    os.makedirs(os.path.dirname(cachefile), exist_ok=True)
+
+    with open(cachefile, 'w') as f:
+        json.dump({'version': version, 'project': custom, 'stopwords': sorted(words)}, f)
+
+    return words
+
+#
+# Load the lemma cache
+#
+# The function takes one argument:
+#
+# path: the path of the cache file -- nothing is loaded if it
+# doesn't exist or was saved by another lemmatiser version
+#
+
+def load_lemma_cache(path):
+
+    lemma_cache.clear()
+    lemma_added.clear()
+
+    if os.path.exists(path):
+
+        with open(path) as f:
+            cache = json.load(f)
+
+        if cache['version'] == LEMMA_VERSION:
+            lemma_cache.update(cache['lemmas'])
+
+#
+# Save the lemma cache
+#
+# The function takes one argument:
+#
+# path: the path of the cache file
+#
+# Words lemmatised by worker processes need to be added to
+# 'lemma_cache' before saving
+#
+
+def save_lemma_cache(path):
+
+    files.write_json(path, {'version': LEMMA_VERSION, 'lemmas': lemma_cache})
+
+#
+# Lemmatise a word using the lemma cache
+#
+# The function takes one argument:
+#
+# word: the word to lemmatise
+#
+# The lemmatiser (and so the WordNet data) is only loaded the
+# first time a word isn't in the cache
+#
+# The function returns the lemma of the word
+#
+
+def lemmatize(word):
+
+    lemma = lemma_cache.get(word)
+
+    if lemma is None:
+        lemma = get_lemmatizer().lemmatize(word)
+        lemma_cache[word] = lemma
+        lemma_added[word] = lemma
+
+    return lemma
+
+#
+# Patterns and tables used to normalise tweet text -- compiled
+# once when the module is loaded
+#
+# URL_PATTERN: matches URLs -- a run of word characters starting
+# with a letter or digit followed by '://' and everything up to
+# the next white space
+#
+# DISALLOWED_PATTERN: matches runs of characters which aren't a
+# letter, digit, space or tab
+#
+# DIGITS_LOWER: a translation table which deletes digits and
+# lowercases letters
+#
+
+URL_PATTERN = re.compile(r"[0-9A-Za-z]\w*://\S+")
+DISALLOWED_PATTERN = re.compile(r"[^0-9A-Za-z \t]+")
+DIGITS_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase, string.digits)
+
+#
+# Normalise the text of a tweet
+#
+# The function takes one argument:
+#
+# txt: A string of text to normalise
+#
+# This gives exactly the same text as the chain of steps
+# 'clean.py' used to run -- a regular expression removing URLs
+# and every character which isn't a letter, digit, space or
+# tab one character at a time, collapsing white space,
+# stripping punctuation character by character, removing
+# numbers and lowercasing -- with fewer, cheaper passes:
+#
+# 1. URLs are removed first (only if the text contains '://'
+#    since a URL can't match otherwise)
+#
+# 2. Runs of characters which aren't a letter, digit, space or
+#    tab are removed in one go and white space is collapsed --
+#    after this there is never any punctuation left to strip
+#
+# 3. Removing numbers and lowercasing are done together with a
+#    single translation table
+#
+# The function returns the normalised text
+#
+
+def normalize(txt):
+
+    if '://' in txt:
+        txt = URL_PATTERN.sub("", txt)
+
+    return " ".join(DISALLOWED_PATTERN.sub("", txt).split()).translate(DIGITS_LOWER)
+
+#
+# Cleanse a raw tweet .csv file
+#
+# The function takes three arguments:
+#
+# rawfile: the path of the raw CSV file
+#
+# cleanfile: the path of the cleansed CSV file to write
+#
+# stopwords_en: the set of stopwords to remove (see
+# 'get_stopwords')
+#
+# The function returns a tuple of:
+#
+# 1. a list of the cleansed tweets in the order they appear in
+#    the raw file where each tweet is a list of the six data
+#    points written to the cleansed file (tweet ID, creation
+#    date, cleansed text, and lists of words, words excluding
+#    stopwords and lemmas)
+#
+# 2. a dictionary of the words lemmatised for this file so they
+#    can be added to the saved cache
+#
+
+def clean_file(rawfile, cleanfile, stopwords_en):
+
+    #
+    # Output some info for the user to keep them posted on progress
+    #
+
+    print('Processing file: ' + os.path.basename(rawfile))
+
+    #
+    # Only keep track of the words lemmatised for this file -- the
+    # words lemmatised for earlier files have already been returned
+    #
+
+    lemma_added.clear()
+
+    #
+    # Create empty objects to hold a list of tweet text and tweet
+    # creation dates
+    #
+
+    tweets = {}
+    tweets_dates = {}
+
+    #
+    # Open the raw CSV file for reading
+    #
+
+    with open(rawfile, newline='') as csvfile:
+
+        #
+        # Create a CSV DictReader to read the file
+        #
+
+        reader = csv.DictReader(csvfile)
+
+        #
+        # Loop through rows in the CSV and read in the tweet text and dates
+        # Using the Tweet ID as the keys in the 'tweets' and 'tweet_dates'
+        # objects
+        #
+
+        for row in reader:
+            tweets[row['tweet_id']] = row['text']
+            tweets_dates[row['tweet_id']] = row['created_at']
+
+    #
+    # Create empty objects to hold various processed data:
+    #
+    # tweet_lemmas: holds lemmas of words in a tweet
+    # tweet_words: holds list of words in a tweet
+    # tweet_clean: holds cleansed text of tweets
+    # tweet_stopwords: holds cleansed text of tweets without stopwords
+    #
+    # The tweet ID will be the key in each object
+    #
+
+    tweet_lemmas = {}
+    tweet_words = {}
+    tweet_clean = {}
+    tweet_stopwords = {}
+
+    #
+    # Loop through every tweet to perform a whole bunch of work
+    #
+
+    for tweet_id in tweets:
+
+        #
+        # Get the tweet's text and normalise it -- removing URLs, punctuation
+        # and numbers and standardising the text to lowercase
+        #
+
+        text = normalize(tweets[tweet_id])
+
+        #
+        # Store the cleansed text in tweet_clean
+        #
+
+        tweet_clean[tweet_id] = text
+
+        #
+        # Store the list of words in the tweet in tweet_words
+        #
+        # We get the list of words by just using split() to
+        # split into words
+        #
+
+        tweet_words[tweet_id] = text.split()
+
+        #
+        # Store the list of words without stopwords in tweet_stopwords
+        #
+        # We remove stopwords by iterating through each word in tweet_words
+        # and checking if it is in the set of stopwords
+        #
+
+        tweet_stopwords[tweet_id] = [word for word in tweet_words[tweet_id] if word not in stopwords_en]
+
+        #
+        # Define an empty list in tweet_lemmas for the list of lemmatised words
+        # in the tweet
+        #
+
+        tweet_lemmas[tweet_id] = []
+
+        #
+        # Loop through the list of words (excluding stopwords) and add
+        # the lemmatised word to the list in tweet_lemmas
+        #
+        # We lemmatise the word with the NLTK WordNet lemmatiser (through
+        # the lemma cache)
+        #
+        # append() is used to add each lemmatised term to the list
+        #
+
+        for word in tweet_stopwords[tweet_id]:
+            tweet_lemmas[tweet_id].append(lemmatize(word))
+
+    #
+    # Gather the six data points of each tweet into rows
+    #
+
+    rows = []
+
+    for tweet_id in tweet_clean:
+        rows.append([tweet_id, tweets_dates[tweet_id], tweet_clean[tweet_id], tweet_words[tweet_id], tweet_stopwords[tweet_id], tweet_lemmas[tweet_id]])
+
+    #
+    # Open the matching CSV in the 'cleaned" subdirectory for writing
+    #
+
+    with open(cleanfile, 'w') as fi:
+
+        #
+        # Prepare to write to the file with the CSV module
+        #
+
+        writer = csv.writer(fi)
+        writer.writerow(['tweet_id', 'created_at', 'text', 'words', 'stopwords', 'lemmas'])
+
+        #
+        #   Loop through the rows and write out all six data points
+        #
+
+        writer.writerows(rows)
+
+    return rows, dict(lemma_added)
@@ -0,0 +1,166 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Script: compare-all.py
+#
+#   Generate proportion shift and sentiment shift graphs for
+#   every pair of a list of tweet corpora and matrices of the
+#   overall shifts between them
+#
+#   Each pair's graphs are the same as 'compare.py' would
+#   produce and are saved in both projects' 'analysis/'
+#   directories (or, with the 'data-only' option, the shift
+#   scores of every word as .csv files)
+#
+#   The matrices are saved in the first project's 'analysis/'
+#   directory:
+#
+#   - compare_proportion_<period>.csv: the share of word use
+#     which differs between each pair of projects
+#
+#   - compare_sentiment_<period>.csv: the average sentiment of
+#     the project in each column less that of the project in
+#     each row
+#
+#   Each project's word frequencies are counted once (and
+#   cached -- see 'shifts.py') however many projects it is
+#   compared with, and with the 'workers' option pairs are
+#   compared in parallel by that many worker processes
+#
+#   Make sure 'dedup.py' has been run on every project's tweet
+#   data before calling this script
+#
+################################################################
+#
+#   The approach taken in this script (and some parts of the
+#   code) are based on class lectures and notes from the
+#   CEU Digital Tools course for BA students in the 2020-21
+#   academic year.
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import itertools as it
+import pandas as pd
+import parallel
+import shifts
+import config
+
+#
+# Create object to hold the word frequencies for the analysis
+#
+
+frequencies = {}
+
+#
+# Get the number of processes to use -- spaCy uses this many to
+# process tweets and pairs are compared in this many worker
+# processes (one by default)
+#
+
+workers = int(options.get('workers', 1))
+
+#
+# Iterate through the projects to compare and get their word
+# frequencies -- from the project's 'cache/frequencies' subdirectory
+# if the period has already been counted (see 'shifts.py')
+#
+
+for key in projects:
+
+    analysispath = config.basepath + key + '/analysis/'
+    cachepath = config.basepath + key + '/cache/'
+
+    frequencies[key] = shifts.load_frequencies(analysispath, cachepath, year, n_process=workers)
+
+#
+# Check if we are only writing the shift scores of every word as
+# tables rather than drawing graphs (the '--data-only' option, or
+# '--no-plots' as for the other scripts)
+#
+
+data_only = options.get('data-only', False) or options.get('no-plots', False)
+
+#
+# Get every pair of projects -- each pair is compared once in the
+# order the projects are listed
+#
+
+pairs = list(it.combinations(projects, 2))
+
+#
+# Slow script, so keep the user updated
+#
+
+print('Comparing ' + str(len(pairs)) + ' pairs of projects')
+
+#
+# Compare the pairs -- in parallel if we have more than one worker --
+# and save each pair's graphs (or tables) in both projects -- each is
+# rendered once in the shared 'artifacts' directory and linked into
+# both projects (see 'shifts.py')
+#
+
+results = parallel.starmap(shifts.compare_pair,
+                           [(pair,
+                             [frequencies[pair[0]], frequencies[pair[1]]],
+                             year,
+                             [config.basepath + pair[0] + '/analysis/', config.basepath + pair[1] + '/analysis/'],
+                             config.basepath + 'artifacts/',
+                             data_only)
+                            for pair in pairs],
+                           workers=workers)
+
+#
+# Gather the overall shifts into matrices with a row and column for
+# each project -- the proportion shift is the same both ways round
+# and the sentiment shift changes sign
+#
+
+proportion = pd.DataFrame(0.0, index=projects, columns=projects)
+sentiment = pd.DataFrame(0.0, index=projects, columns=projects)
+
+for pair, result in zip(pairs, results):
+
+    proportion.loc[pair[0], pair[1]] = result['proportion']
+    proportion.loc[pair[1], pair[0]] = result['proportion']
+
+    sentiment.loc[pair[0], pair[1]] = result['sentiment']
+    sentiment.loc[pair[1], pair[0]] = -result['sentiment']
+
+#
+# Save the matrices in the first project's analysis directory
+#
+
+analysispath = config.basepath + projects[0] + '/analysis/'
+
+proportion.to_csv(analysispath + 'compare_proportion_' + year + '.csv')
+sentiment.to_csv(analysispath + 'compare_sentiment_' + year + '.csv')
@@ -17,7 +17,12 @@
 #   two tweet corpora
 #
 #   Copies of the graphs will be saved in both your project's
-#   'analysis/' directory for reference
+#   'analysis/' directory for reference -- each graph is drawn
+#   once in the 'artifacts/' directory of the base directory and
+#   linked into both projects
+#
+#   With the 'data-only' option the shift scores of every word
+#   are saved as .csv files instead of drawing the graphs
 #
 #   Make sure 'dedup.py' has been run on both projects' tweet
 #   data before calling this script
@@ -50,12 +55,7 @@
 #
 ################################################################
 
-import pandas as pd
-import re
-import spacy
-import csv
-import shifterator as sh
-import collections as co
+import shifts
 import config
 
 #
@@ -69,217 +69,60 @@ analysispath1 = config.basepath + shift[0] + '/analysis/'
 analysispath2 = config.basepath + shift[1] + '/analysis/'
 
 #
-# Create object to hold the corpora for the analysis
+# Create object to hold the word frequencies for the analysis
 #
 
-corpora = {}
+frequencies = {}
 
 #
-# Let's load Spacy ready for the this analysis
-#
-# To use Spacy this way we first need to prepare for it:
-#
-# 1. Install spacy, for instance:
-#
-# conda install spacy
-#
-# 2. At the command prompt download the en_core_web_sm data set:
-#
-# python -m spacy download en_core_web_sm
+# Get the number of processes spaCy should use to process tweets (one
+# by default)
 #
 
-nlp = spacy.load('en_core_web_sm')
-nlp.max_length = 2000000
+workers = int(options.get('workers', 1))
 
 #
-# Iterate through the two projects to compare and create corpora
+# Iterate through the two projects to compare and get their word
+# frequencies
 #
 
 for key in shift:
 
     #
-    # Get the relevant project
-    #
-
-    project = config.projects[key]
-
-    #
-    # Analysis path for this project
+    # Analysis and cache paths for this project
     #
 
     analysispath = config.basepath + key + '/analysis/'
+    cachepath = config.basepath + key + '/cache/'
 
     #
-    # Create list to hold list of tweet words
-    #
-
-    tweets_list = []
-
-    #
-    # Open 'alltweets_dedup.csv' for reading
-    #
-
-    with open(analysispath + 'alltweets_dedup.csv', newline='') as csvfile:
-
-        #
-        # Read the contents of the file into a CSV DictReader
-        #
-
-        reader = csv.DictReader(csvfile)
-
-        #
-        # Iterate through the rows
-        #
-
-        for row in reader:
-
-            #
-            # Check if the tweet's date is in the target year
-            #
-
-            if row['created_at'].startswith(year):
-                #
-                # Add the row to the tweets list
-                #
-
-                tweets_list.append(row)
-
-    #
-    # Create tweets data frame
-    #
-
-    tweets = pd.DataFrame(tweets_list)
-
-    #
-    # Let's create a corpus string to store the content of all tweets
-    # in chronological order in a string to generate a sentiment time
-    # series of valence on the whole corpus of tweets
-    #
-    # We start with reversing the order of the tweets and creating
-    # a raw corpus string of all tweet content -- order is reversed
-    # because our CSV is reverse chronological order
-    #
-
-    corpus_raw = ''
-
-    for idx in reversed(tweets.index):
-        corpus_raw = corpus_raw + str(tweets.loc[idx, 'text']) + '\n'
-
-    #
-    # Remove extra white space, lowercase all words
-    #
-
-    corpus_re = re.sub( r'\W+', ' ', corpus_raw ).lower().strip()
-
-    #
-    # Create a Spacy object
-    #
-
-    corpus_nlp = nlp(corpus_re)
-
-    #
-    # Delete stopwords and lemmatise the full corpus
+    # Get the frequencies of the lemmas of the tweets in the target year
+    # (stopwords deleted) -- they are loaded from the project's
+    # 'cache/frequencies' subdirectory if this period has already been
+    # counted otherwise they are counted from the period's lemmas (which
+    # are themselves cached in 'cache/corpora') -- see 'shifts.py'
     #
 
-    corpus = [w.lemma_ for w in corpus_nlp if nlp.vocab[w.text].is_stop == False if len(w) > 1]
-
-    #
-    # Store the corpus in the corpora object
-    #
-    corpora[key] = corpus
+    frequencies[key] = shifts.load_frequencies(analysispath, cachepath, year, n_process=workers)
 
 #
-# Define reference/comparison corpus texts as specified in Config
+# Check if we are only writing the shift scores of every word as
+# tables rather than drawing graphs (the '--data-only' option, or
+# '--no-plots' as for the other scripts)
 #
 
-corpus_ref = corpora[shift[0]]
-corpus_com = corpora[shift[1]]
+data_only = options.get('data-only', False) or options.get('no-plots', False)
 
 #
-# Get word frequencies from the corpora
-#
-
-corpus_ref_freq = dict(co.Counter(corpus_ref).most_common())
-corpus_com_freq = dict(co.Counter(corpus_com).most_common())
-
-#
-# Specify the number of words to display in shift graphs
-#
-
-top_n = 50
-
-#
-# Compute proportion shift object using shifterator
-#
-
-proportion_shift = sh.ProportionShift( type2freq_1=corpus_ref_freq,
-                                       type2freq_2=corpus_com_freq )
-
-#
-# Generate proportion shift graph and save in first project
-#
-# File name is based on the two project keys for clarity
-#
-
-proportion_shift.get_shift_graph( top_n=top_n,
-                                  system_names=[shift[0], shift[1]],
-                                  show_plot=False,
-                                  filename=analysispath1 + shift[0] + '_' + shift[1] + '_proportion_' + year + '.png',
-                                  title='Proportion Shift: ' + shift[0] + ', ' + shift[1])
-
+# Compute the proportion shift and sentiment shift (using the LabMT
+# sentiment lexicon included in Shifterator) of the comparison
+# project against the reference project and save the graphs (or
+# tables) in both projects -- each is rendered once in the shared
+# 'artifacts' directory and linked into both projects (see
+# 'shifts.py')
 #
-# Generate again and sav e in second project
+# File names are based on the two project keys for clarity
 #
-# File name is based on the two project keys for clarity
-#
-
-proportion_shift.get_shift_graph( top_n=top_n,
-                                  system_names=[shift[0], shift[1]],
-                                  show_plot=False,
-                                  filename=analysispath2 + shift[0] + '_' + shift[1] + '_proportion_' + year + '.png',
-                                  title='Proportion Shift: ' + shift[0] + ', ' + shift[1])
-
-#
-# Prepare to generate a sentiment shift graph by
-# by specifying the sentiment lexicon, the
-#
-
-sent_lex = 'labMT_English' # Sentiment lexicon
-sent_ref = 5 # (arbitrary) Reference value for sentiment regimes
-sent_int = [(4,6)] # Interval of sentiment scores to consider
-
-#
-# Compute sentiment shift object
-# We use the LabMT sentiment lexicon (included in Shifterator)
-#
-
-sentiment_shift = sh.WeightedAvgShift(type2freq_1=corpus_ref_freq,
-                                       type2freq_2=corpus_com_freq,
-                                       type2score_1=sent_lex,
-                                       reference_value=sent_ref,
-                                       stop_lens=sent_int)
-
-#
-# Generate sentiment shift graph and save in first project
-#
-# File name is based on the two project keys for clarity
-#
-
-sentiment_shift.get_shift_graph(top_n=top_n, detailed=True,
-                                system_names=[shift[0], shift[1]],
-                                show_plot=False,
-                                filename=analysispath1 + shift[0] + '_' + shift[1] + '_sentiment_' + year + '.png',
-                                title='Sentiment Shift: ' + shift[0] + ', ' + shift[1])
-
-#
-# Generate sentiment shift graph and save in second project
-#
-# File name is based on the two project keys for clarity
-#
-
-sentiment_shift.get_shift_graph(top_n=top_n, detailed=True,
-                                system_names=[shift[0], shift[1]],
-                                show_plot=False,
-                                filename=analysispath2 + shift[0] + '_' + shift[1] + '_sentiment_' + year + '.png',
-                                title='Sentiment Shift: ' + shift[0] + ', ' + shift[1])
 
+shifts.compare_pair(shift, [frequencies[shift[0]], frequencies[shift[1]]], year, [analysispath1, analysispath2],
+                    config.basepath + 'artifacts/', data_only=data_only)
@@ -0,0 +1,322 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: cubes.py
+#
+#   Per-month frequency tables ("cubes") used by 'wordcount.py'
+#   and 'tfidf.py' so an analysis for a year or month merges a
+#   few small tables instead of counting every tweet again
+#
+#   The tables live in the 'cubes' subdirectory of the
+#   project's 'cache' directory:
+#
+#   - YYYY-MM.json: how many times each lemma appears in the
+#     tweets published that month
+#
+#   - YYYY-MM_terms.json: the number of tweets published that
+#     month and, for each term in their text (split into terms
+#     the same way as the TF-IDF vectoriser does), how many
+#     times it appears and how many tweets it appears in -- the
+#     term counts and document frequencies TF-IDF needs
+#
+#   - meta.json: a signature for each month's tweets (how many
+#     there are and a sum of their tweet IDs) so we can tell
+#     which months have changed since their table was made
+#
+#   'clean.py' updates the tables after writing the tweet store
+#   -- only the months with new or changed tweets are counted
+#   again -- and 'wordcount.py' brings them up to date before
+#   using them in case the store was built some other way
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import json
+import collections
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+import store
+import files
+
+#
+# Version of the table layout -- bump this if the layout changes
+# so old tables are rebuilt
+#
+
+CUBE_FORMAT = 2
+
+#
+# Number of tweets to read and count at a time when counting a
+# month so only one batch of tweets is held in memory at a time
+# (the default -- 'tfidf.py' passes its '--chunk N' option)
+#
+
+BATCH_SIZE = 50000
+
+#
+# Utility function to work out the signature of each month's
+# tweets in a store
+#
+# The function returns a dictionary of months (as 'YYYY-MM') and
+# their signatures
+#
+
+def month_signatures(st):
+
+    if st['rows'] == 0:
+        return {}
+
+    #
+    # The date index already has the tweets in date order so the
+    # tweets of each month are next to each other
+    #
+
+    months = store.load_array(st, 'date_sorted').astype('datetime64[M]')
+    ids = np.asarray(store.load_array(st, 'tweet_id'))[store.load_array(st, 'date_order')]
+
+    distinct, starts, counts = np.unique(months, return_index=True, return_counts=True)
+    sums = np.add.reduceat(ids.astype(np.uint64), starts)
+
+    return {month: str(count) + ':' + str(total)
+            for month, count, total in zip(np.datetime_as_string(distinct, unit='M').tolist(), counts.tolist(), sums.tolist())}
+
+#
+# Utility function to count the lemmas and terms of the tweets
+# published in a month
+#
+# The function returns a tuple of:
+#
+# 1. a dictionary of lemmas and their counts
+#
+# 2. a dictionary holding the number of tweets ('tweets') and a
+#    dictionary of terms with a list of how many times each
+#    appears and how many tweets it appears in ('terms')
+#
+
+def count_month(st, month, batch=BATCH_SIZE):
+
+    rows = store.select(st, month)
+
+    counter = collections.Counter()
+    terms = {}
+
+    for start in range(0, len(rows), batch):
+
+        chosen = rows[start:start + batch]
+
+        for lemmas in store.read_column(st, 'lemmas', chosen):
+            counter.update(lemmas)
+
+        #
+        # Count the terms with the vectoriser's own analyser (with no
+        # stopwords -- they are left out when the tables are used so
+        # the tables don't depend on the project's stopwords)
+        #
+
+        vectorizer = CountVectorizer()
+
+        try:
+            matrix = vectorizer.fit_transform(store.read_column(st, 'text', chosen)).tocsc()
+        except ValueError:
+            continue # No terms at all in this batch of tweets
+
+        names = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        counts = np.asarray(matrix.sum(axis=0)).ravel().tolist()
+        docs = np.diff(matrix.indptr).tolist()
+
+        for name, count, doc in zip(names, counts, docs):
+            total = terms.setdefault(name, [0, 0])
+            total[0] += count
+            total[1] += doc
+
+    return dict(counter), {'tweets': len(rows), 'terms': terms}
+
+#
+# Bring a project's tables up to date
+#
+# Function takes four arguments:
+#
+# analysispath: the project's 'analysis' directory
+#
+# cubepath: the directory holding the project's tables
+#
+# months: a list of months (as 'YYYY-MM') whose tweets are known
+# to have changed or None if every month may have changed --
+# other months are only counted again if their signature has
+# changed
+#
+# batch: the number of tweets to count at a time (defaults to
+# 'BATCH_SIZE')
+#
+# The tables record the build ID of the store they were brought up
+# to date with -- if the store hasn't been rebuilt since and no
+# months are known to have changed there is nothing to do, so the
+# signatures (which need every tweet in the store) aren't worked
+# out on every query
+#
+
+def update_cubes(analysispath, cubepath, months=None, batch=BATCH_SIZE):
+
+    st = store.open_store(analysispath)
+
+    meta = {'format': CUBE_FORMAT, 'store': None, 'months': {}}
+
+    if os.path.exists(cubepath + 'meta.json'):
+        with open(cubepath + 'meta.json') as f:
+            meta = json.load(f)
+
+    if meta['format'] != CUBE_FORMAT:
+        meta = {'format': CUBE_FORMAT, 'store': None, 'months': {}}
+
+    if months is not None and len(months) == 0 and st['build'] is not None and meta.get('store') == st['build']:
+        return
+
+    signatures = month_signatures(st)
+
+    os.makedirs(cubepath, exist_ok=True)
+
+    #
+    # Count each month which has changed
+    #
+
+    for month, signature in signatures.items():
+
+        if months is not None and month not in months and meta['months'].get(month) == signature:
+            continue
+
+        print('Counting lemmas and terms for ' + month)
+
+        lemmas, terms = count_month(st, month, batch)
+
+        files.write_json(cubepath + month + '.json', lemmas)
+        files.write_json(cubepath + month + '_terms.json', terms)
+
+        meta['months'][month] = signature
+
+    #
+    # Remove the tables of months which no longer have any tweets
+    #
+
+    for month in list(meta['months']):
+
+        if month not in signatures:
+            del meta['months'][month]
+
+            for filename in [month + '.json', month + '_terms.json']:
+                if os.path.exists(cubepath + filename):
+                    os.remove(cubepath + filename)
+
+    #
+    # Write the signatures and store build ID last so an interrupted
+    # update is picked up again next time
+    #
+
+    meta['store'] = st['build']
+
+    files.write_json(cubepath + 'meta.json', meta, indent=1)
+
+#
+# Utility function to bring a project's tables up to date and get
+# the months in a period
+#
+# The function returns a sorted list of months (as 'YYYY-MM')
+#
+
+def period_months(analysispath, cubepath, year, batch=BATCH_SIZE):
+
+    update_cubes(analysispath, cubepath, [], batch)
+
+    with open(cubepath + 'meta.json') as f:
+        meta = json.load(f)
+
+    return [month for month in sorted(meta['months']) if month == year or month.startswith(year + '-')]
+
+#
+# Get the lemma counts for a period
+#
+# Function takes four arguments:
+#
+# analysispath: the project's 'analysis' directory
+#
+# cubepath: the directory holding the project's tables
+#
+# year: the period as YYYY or YYYY-MM
+#
+# batch: the number of tweets to count at a time if any month's
+# tables need counting (defaults to 'BATCH_SIZE')
+#
+# The function returns a collections counter of lemmas and how
+# many times they appear in the tweets published in the period
+#
+
+def load_counts(analysispath, cubepath, year, batch=BATCH_SIZE):
+
+    counter = collections.Counter()
+
+    for month in period_months(analysispath, cubepath, year, batch):
+
+        with open(cubepath + month + '.json') as f:
+            counter.update(json.load(f))
+
+    return counter
+
+#
+# Get the term counts and document frequencies for a period
+#
+# Takes the same arguments as 'load_counts'
+#
+# The function returns a tuple of the number of tweets published
+# in the period and a dictionary of terms with a list of how many
+# times each appears and how many tweets it appears in
+#
+
+def load_terms(analysispath, cubepath, year, batch=BATCH_SIZE):
+
+    tweets = 0
+    terms = {}
+
+    for month in period_months(analysispath, cubepath, year, batch):
+
+        with open(cubepath + month + '_terms.json') as f:
+            table = json.load(f)
+
+        tweets += table['tweets']
+
+        for term, (count, docs) in table['terms'].items():
+            total = terms.setdefault(term, [0, 0])
+            total[0] += count
+            total[1] += docs
+
+    return tweets, terms
@@ -16,6 +16,10 @@
 #   Perform word embedding analysis on tweets and produce a
 #   word network graph.
 #
+#   The links of the network are saved in a .csv file and the
+#   graphs are rendered at the end (see 'render.py') -- with the
+#   'no-plots' option only the .csv files are written
+#
 #   Make sure 'dedup.py' has been run on your project's tweet
 #   data before calling this script
 #
@@ -48,269 +52,226 @@
 ################################################################
 
 
+import gzip
+import csv
 import pandas as pd
 import networkx as nx
 import itertools as it
-import csv
-import matplotlib.pyplot as plt
-from matplotlib import cm
 import nltk
 nltk.download('stopwords')
-from gensim.models import Word2Vec
-import gensim.downloader as api
+import numpy as np
+import similarity
+import layouts
+import render
+import plots
+import store
+import vectorcache
 import config
 
 #
-# Utility function to plot network graph and
-# save the resulting graph in a specified file
-#
-# Function takes six arguments:
-#
-# net: the networkx object of the network to graph
-#
-# thres: threshold value to limit the graph to only
-# nodes with similarity values greater than the threshold
-#
-# node_options: options to pass to draw_network_nodes
-#
-# filename: filename and path to save the graph
+# Define paths for analysis files.
 #
-# label_options: options to pass to draw_network_labels
-# (defaults to 'None')
+# The 'analysis' subdirectory stores various data files generated
+# in the analysis process including generated graphs etc
 #
-# seed: seed value for the spring layout (default to '1')
+# The 'cache' subdirectory stores data kept between runs to save
+# work
 #
 
-def plot_network(net, thres, node_options, filename, label_options=None, seed=1):
-
-    #
-    # Initalise lists to hold list of edges, weights and widths
-    #
+analysispath = config.basepath + project['key'] + '/analysis/'
+cachepath = config.basepath + project['key'] + '/cache/'
 
-    edgelist = []
-    weights = []
-    widths = []
+#
+# Load the lemmas of the tweets in the target year from the project's
+# tweet store into a list of tweet words -- each tweet's lemmas come
+# back as a list of words
+#
 
-    #
-    # Loop through links and weights and add eddges and weights
-    # to the lists above if their weight exceeeds the threshold
-    #
+content = store.load(analysispath, ['lemmas'], year)['lemmas']
 
-    for i, j, w in net.edges.data('weight'):
+#
+# Flatten tweet list with itertools (and transform to set to remove word duplicates)
+#
 
-        #
-        # Check if we exceed the threshold
-        #
+content_flat = set( it.chain( *content ) )
 
-        if w > thres:
+#
+# Make sure the project's word vector cache in the 'cache/vectors'
+# subdirectory has the vectors of every lemma in the project's tweets
+# -- the Google News word2vec model is only loaded if there are
+# lemmas which have never been looked up
+#
 
-            #
-            # If we exceed the threshold, add to edgelist and weights
-            #
+vectorcache.update_cache(cachepath + 'vectors/', vectorcache.project_lemmas(analysispath))
 
-            edgelist.append((i, j))
-            weights.append(w)
+#
+# Get a sorted list of the words which are in the Google model and
+# their vectors from the cache
+#
 
-    #
-    # Normalise weights based on max/min values in weights list
-    #
-    # We need to loop through links and weights again to do this
-    #
+words, vectors = vectorcache.load_vectors(cachepath + 'vectors/', sorted(content_flat))
 
-    for i, j, w in net.edges.data('weight'):
+#
+# Normalise the vectors so the similarity of two words is the dot
+# product of their vectors
+#
 
-        #
-        # Check if we exceed the threshold
-        #
+unit = similarity.unit_vectors(vectors)
 
-        if w > thres:
+#
+# Check if we are using the approximate engine (the '--ann' option)
+# and get its settings -- the number of hash tables ('--ann-tables T',
+# enough to expect to find 90% of the pairs at the threshold if not
+# given) and bits in each hash ('--ann-bits B', chosen from the number
+# of words if not given)
+#
 
-            #
-            # If we exceed the threshold, normalise
-            #
+ann = options.get('ann', False)
 
-            widths.append(1 + (w - min(weights)) / (max(weights) - min(weights)))
+ann_tables = int(options['ann-tables']) if 'ann-tables' in options else None
+ann_bits = int(options['ann-bits']) if 'ann-bits' in options else None
 
-    #
-    # Initialise figure in matplotlib -- set the size of image driven by number
-    # of edges with a simplistic formula with an upper limit on pixels
-    #
+ann_tables, ann_bits = similarity.ann_settings(len(unit), thres, ann_tables, ann_bits)
 
-    fig_width = int(len(edgelist) / 5)
-    fig_height = int(fig_width * 0.8)
+#
+# Tell the user how many of the pairs the approximate engine is
+# expected to find (at least) and warn them if it is less than we aim
+# for -- the pairs it misses are missing from the network
+#
 
-    if (fig_width > 78):
-        fig_width = 78
-        fig_height = 60
+if ann:
 
-    if (fig_width < 26):
-        fig_width = 26
-        fig_height = 20
+    expected = similarity.expected_recall(thres, ann_tables, ann_bits)
 
-    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+    print('Approximate engine: {} tables of {} bits, expected recall at least {:.1%}'.format(ann_tables, ann_bits, expected))
 
-    #
-    # Calculate node positions according to spring layout
-    #
+    if expected < similarity.ANN_RECALL:
+        print('Warning: the approximate engine may miss many links -- use more tables (--ann-tables) or fewer bits (--ann-bits), and check with --ann-recall')
 
-    node_pos = nx.spring_layout(net, seed=seed)
+#
+# If asked for (the '--ann-recall' option), report how many of the
+# pairs above the threshold the approximate engine finds and how long
+# it takes compared with the exact engine
+#
 
-    #
-    # Draw nodes with specified options
-    #
+if options.get('ann-recall', False):
 
-    node_draw = nx.draw_networkx_nodes(net, node_pos, **node_options)
+    report = similarity.ann_recall(unit, thres, ann_tables, ann_bits)
 
-    #
-    # Draw node labels with specified options
-    #
+    print('Approximate engine found {:,} of {:,} pairs above {} (recall {:.1%})'.format(report['found'], report['exact'], thres, report['recall']))
+    print('Exact engine: {:.2f}s, approximate engine: {:.2f}s'.format(report['exact_time'], report['ann_time']))
 
-    #
-    # Draw labels if 'label_options' exists
-    #
+#
+# Check if we are writing out every pair of words and its similarity
+# (the '--dump' option)
+#
 
-    if label_options:
-        label_draw = nx.draw_networkx_labels(net, node_pos, **label_options)
+dump = options.get('dump', False)
 
-    #
-    # Set edge drawing options
-    #
+#
+# Check if we are only keeping each word's K most similar links in
+# the word network (the '--knn K' option)
+#
 
-    edge_options = {
-        'edgelist': edgelist,
-        'width': widths,
-        'edge_color': weights,
-        'edge_cmap': cm.get_cmap('winter_r'),
-        'edge_vmin': min(weights),
-        'edge_vmax': max(weights),
-    }
+knn = int(options['knn']) if 'knn' in options else None
 
-    #
-    # Draw edges with specified options
-    #
+#
+# Get the number of worker processes to render graphs in (one by
+# default) and check if we are only writing data files and not
+# rendering graphs (the '--no-plots' option)
+#
 
-    edge_draw = nx.draw_networkx_edges(net, node_pos, **edge_options)
+workers = int(options.get('workers', 1))
+no_plots = options.get('no-plots', False)
 
-    #
-    # Draw colorbar with weight values
-    #
+#
+# Create objects to hold the 25 most and least similar pairs of words,
+# count the pairs and hold the blocks of pairs above the threshold
+# (the links of the word network)
+#
 
-    cbar = plt.colorbar(edge_draw, shrink=0.5, aspect=10)
-    cbar.set_label('word2vec similarity')
+most_similar = similarity.no_pairs()
+least_similar = similarity.no_pairs()
 
-    #
-    # Save the graph to the specified file
-    #
+count = 0
 
-    plt.savefig(filename)
+links = [similarity.no_pairs()]
 
 #
-# Define paths for analysis files.
-#
-# The 'analysis' subdirectory stores various data files generated
-# in the analysis process including generated graphs etc
+# If we are writing out every pair, open 'similarities_<year>.csv.gz'
+# to write them to -- the file is compressed with gzip and the pairs
+# are written a block at a time as they are worked out (so they are
+# not sorted)
 #
 
-analysispath = config.basepath + project['key'] + '/analysis/'
+if dump:
+    dumpfile = gzip.open(analysispath + 'similarities_' + year + '.csv.gz', 'wt', newline='')
+    dumpwriter = csv.writer(dumpfile)
+    dumpwriter.writerow(['word1', 'word2', 'similarity'])
 
 #
-# Create list to hold list of tweet words
+# Work out the similarities of all unique 2-word combinations a block
+# of words at a time with matrix multiplication
+#
+# With the approximate engine we only get (most of) the pairs above
+# the threshold
 #
 
-content = []
+if ann:
+    pairs = similarity.ann_pairs(unit, thres, ann_tables, ann_bits)
+else:
+    pairs = similarity.similar_pairs(unit)
 
 #
-# Open 'alltweets_dedup.csv' for reading
+# Loop through the blocks of word pairs and their similarity values,
+# keeping the most and least similar pairs, writing them out if we are
+# dumping them and keeping the pairs above the threshold for the
+# network -- we never keep all the pairs in a list so memory use
+# doesn't grow with the number of pairs
 #
 
-with open(analysispath + 'alltweets_dedup.csv', newline='') as csvfile:
+words_array = np.array(words, dtype=object)
 
-    #
-    # Read the contents of the file into a CSV DictReader
-    #
+for first, second, sims in pairs:
 
-    reader = csv.DictReader(csvfile)
+    count += len(sims)
 
-    #
-    # Iterate through the rows
-    #
-
-    for row in reader:
-
-        #
-        # Check if the tweet's date is in the target year
-        #
-
-        if row['created_at'].startswith(year):
+    most_similar = similarity.keep_extremes(most_similar, (first, second, sims), 25, largest=True)
+    least_similar = similarity.keep_extremes(least_similar, (first, second, sims), 25, largest=False)
 
-            #
-            # Grab the lemmas as a string of text (which is what comes from the CSV
-            # and strip out the leading [' and trailing '] so we can split in the next step
-            #
-            # In the CSV the field looked like:
-            #
-            # ['word1','word2', ... ,'wordX']
-            #
-            # So, the [-2:2] syntax gives us:
-            #
-            # word1','word2', ... ,'wordX
-            #
+    if dump:
+        dumpwriter.writerows(zip(words_array[first], words_array[second], sims.tolist()))
 
-            lemmas = row['lemmas'][2:-2]
+    above = sims > thres
+    links.append((first[above], second[above], sims[above]))
 
-            #
-            # Split the lemmas string into a list of words using the following
-            # string to split:
-            #
-            # ','
-            #
-            # Add the words to the words list
-            #
-
-            content.append(lemmas.split('\', \''))
+if dump:
+    dumpfile.close()
 
 #
-# Get the Google News word2vec model to use on our Twitter data set
+# Save .csv files of most and least similar 25 tuples -- in the same
+# form as the top and bottom of the list of all pairs sorted from most
+# to least similar
 #
 
-wordvectors = api.load( 'word2vec-google-news-300' )
-
-#
-# Flatten tweet list with itertools (and transform to set to remove word duplicates)
-#
+first, second, sims = similarity.sort_pairs(most_similar)
 
-content_flat = set( it.chain( *content ) )
+most_similar_df = pd.DataFrame([((words[i], words[j]), sim) for i, j, sim in zip(first.tolist(), second.tolist(), sims)])
+most_similar_df.to_csv(analysispath + 'most_similar_' + year + '.csv')
 
 #
-# Create object to hold similarities data
+# The approximate engine only finds pairs above the threshold so we
+# can't tell which pairs are least similar
 #
 
-similarities = {}  # initialise dict of word similarities
-
-#
-# Loop through all unique 2-word combinations and save similarities data
-#
-# Make sure we only include tuples with terms that are in the Google model
-#
+if ann:
+    print('Skipping least similar pairs with the approximate engine')
+else:
+    first, second, sims = similarity.sort_pairs(least_similar)
 
-for word_tuple in list(it.combinations(content_flat, 2)):
-
-    #
-    # Check if both words are in the Google model
-    #
-
-    if word_tuple[0] in wordvectors and word_tuple[1] in wordvectors:
-        similarities[word_tuple] = wordvectors.similarity(word_tuple[0], word_tuple[1])
-
-#
-# Save similarities data to a .csv file as well as
-# .csv files of most and least similar 25 tuples
-#
-
-similarities_df = pd.DataFrame(sorted(similarities.items(), key=lambda item: item[1], reverse=True))
-similarities_df.to_csv(analysispath + 'similarities_' + year + '.csv')
-similarities_df.head(25).to_csv(analysispath + 'most_similar_' + year + '.csv')
-similarities_df.tail(25).to_csv(analysispath + 'least_similar_' + year + '.csv')
+    least_similar_df = pd.DataFrame([((words[i], words[j]), sim) for i, j, sim in zip(first.tolist(), second.tolist(), sims)],
+                                    index=range(count - len(sims), count))
+    least_similar_df.to_csv(analysispath + 'least_similar_' + year + '.csv')
 
 #
 # Slow script, so keep the user updated
@@ -318,20 +279,26 @@ similarities_df.tail(25).to_csv(analysispath + 'least_similar_' + year + '.csv')
 
 print('Generating word network object')
 
-
 #
-# Initialise a word network object
+# Put the blocks of links together and, if asked for, only keep the
+# links which are one of the K most similar of either of their words
 #
 
-net = nx.Graph()
+links = tuple(np.concatenate(arrays) for arrays in zip(*links))
+
+if knn is not None:
+    links = similarity.nearest_pairs(links, knn)
 
 #
-# Loop through word pairs and their similarity values
+# Initialise a word network object and add the links -- the network
+# only has the words and links above the threshold (which are the
+# only links drawn) rather than every pair of words so laying it out
+# is quick
 #
 
-for word_pair, sim_val in similarities.items():
-    net.add_edge(word_pair[0], word_pair[1], weight=sim_val)
+net = nx.Graph()
 
+net.add_weighted_edges_from(zip(words_array[links[0]], words_array[links[1]], links[2]))
 
 degrees = dict(net.degree)
 
@@ -353,14 +320,44 @@ label_options = {
 }
 
 #
-# Slow script, so keep the user updated
+# Save the links of the word network in 'embeds_<threshold>_<year>.csv'
+# from most to least similar
 #
 
-print('Plotting network graphs')
+first, second, sims = similarity.sort_pairs(links)
+
+pd.DataFrame({'word1': words_array[first], 'word2': words_array[second], 'similarity': sims}).to_csv(analysispath + 'embeds_' + str(thres) + '_' + year + '.csv', index=False)
 
 #
-# Plot network
+# Queue and render the network graphs (with and without labels) unless
+# we are only writing data files (see 'render.py')
 #
 
-plot_network(net, thres=thres, node_options=node_options, filename=analysispath + 'embeds_' + str(thres) + '_' + year + '.png', label_options=label_options)
-plot_network(net, thres=thres, node_options=node_options, filename=analysispath + 'embeds_nolabels_' + str(thres) + '_' + year + '.png', label_options=None)
+if no_plots == False:
+
+    #
+    # Slow script, so keep the user updated
+    #
+
+    print('Laying out network graph')
+
+    #
+    # Calculate node positions according to spring layout once for both
+    # graphs -- or reuse them if we already have the layout of this
+    # network in the 'cache/layouts' subdirectory (see 'layouts.py')
+    #
+
+    node_pos = layouts.spring_layout(net, thres, 1, cachepath + 'layouts/')
+
+    render.add_plot(plots.network_graph, analysispath + 'embeds_' + str(thres) + '_' + year + '.png', net, thres, node_pos, node_options, label_options)
+    render.add_plot(plots.network_graph, analysispath + 'embeds_nolabels_' + str(thres) + '_' + year + '.png', net, thres, node_pos, node_options, None)
+
+    #
+    # Render the queued graphs -- in parallel if we have more than one
+    # worker
+    #
+
+    render.render_plots(workers)
+
+else:
+    print('Skipping network graphs')
@@ -0,0 +1,102 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: files.py
+#
+#   Write cache files, tables and graphs so they are never left
+#   half-written
+#
+#   Each file is written to a temporary file in the same
+#   directory first and then swapped into place -- if a run
+#   stops part way through, the old file (or no file) is left
+#   rather than a broken one
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import json
+
+#
+# Write a file through a temporary file
+#
+# Function takes two arguments:
+#
+# path: the file to write
+#
+# write: a function which writes the file to the file name it
+# is given
+#
+# The temporary file keeps the file's name and extension (some
+# writers such as matplotlib work out the format from it) with
+# the process ID in front so worker processes writing the same
+# file don't get in each other's way
+#
+
+def write_file(path, write):
+
+    directory, name = os.path.split(path)
+    temporary = os.path.join(directory, 'tmp-' + str(os.getpid()) + '-' + name)
+
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+#
+# Utility function to write a JSON file through a temporary file
+#
+
+def write_json(path, data, indent=None):
+
+    def write(filename):
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=indent)
+
+    write_file(path, write)
+
+#
+# Utility function to write a binary file through a temporary
+# file -- 'write' is given the open file rather than its name
+#
+
+def write_binary(path, write):
+
+    def write_open(filename):
+        with open(filename, 'wb') as f:
+            write(f)
+
+    write_file(path, write_open)
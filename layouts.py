@@ -0,0 +1,131 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: layouts.py
+#
+#   Cache of network graph layouts used by 'embeds.py' -- the
+#   spring layout of a network is the slowest part of drawing
+#   it and the same network is drawn more than once (with and
+#   without labels, and again on later runs)
+#
+#   Layouts are kept in memory for the rest of the run and on
+#   disk in the 'layouts' subdirectory of the project's
+#   'cache' directory, one JSON file of node positions per
+#   layout named after a hash of everything the layout depends
+#   on (the network's nodes and weighted links, the threshold,
+#   the seed and the NetworkX version)
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import json
+import hashlib
+import numpy as np
+import networkx as nx
+import files
+
+#
+# Layouts worked out or loaded during this run
+#
+
+layouts = {}
+
+#
+# Utility function to work out the key of a layout
+#
+# The function returns the key as a hex string
+#
+
+def layout_key(net, thres, seed):
+
+    description = {
+        'networkx': nx.__version__,
+        'thres': thres,
+        'seed': seed,
+        'nodes': list(net.nodes),
+        'edges': [[i, j, repr(float(w))] for i, j, w in net.edges.data('weight')],
+    }
+
+    return hashlib.sha256(json.dumps(description).encode('utf-8')).hexdigest()
+
+#
+# Get the spring layout of a network
+#
+# Function takes four arguments:
+#
+# net: the networkx object of the network
+#
+# thres: the threshold the network was drawn with
+#
+# seed: seed value for the spring layout
+#
+# layoutpath: the directory to keep layouts in (or None to only
+# keep them in memory)
+#
+# The layout is only worked out if it isn't in memory or on disk
+#
+# The function returns a dictionary of nodes and their positions
+# (as 'nx.spring_layout' does)
+#
+
+def spring_layout(net, thres, seed, layoutpath=None):
+
+    key = layout_key(net, thres, seed)
+
+    if key in layouts:
+        return layouts[key]
+
+    filename = None if layoutpath is None else layoutpath + key + '.json'
+
+    if filename is not None and os.path.exists(filename):
+
+        with open(filename) as f:
+            positions = json.load(f)
+
+        layout = {node: np.array(position) for node, position in zip(net.nodes, positions)}
+
+    else:
+
+        layout = nx.spring_layout(net, seed=seed)
+
+        if filename is not None:
+
+            os.makedirs(layoutpath, exist_ok=True)
+
+            files.write_json(filename, [layout[node].tolist() for node in net.nodes])
+
+    layouts[key] = layout
+
+    return layout
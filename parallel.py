@@ -0,0 +1,80 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: parallel.py
+#
+#   Run a function over a list of arguments in a pool of worker
+#   processes
+#
+#   The scripts are run by 'twz.py' or 'tweezo.py' which are
+#   plain scripts -- worker processes must be forked from the
+#   running script because a freshly started worker process
+#   would run the orchestration script again. Where forking is
+#   not available (Windows) the work is done in the current
+#   process instead
+#
+#   Functions passed to this module must be defined in a module
+#   (such as 'cleaner.py') rather than in the scripts
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import multiprocessing
+
+#
+# Call a function for each set of arguments in a list
+#
+# Function takes three arguments:
+#
+# function: the function to call
+#
+# arguments: a list of tuples of arguments to call the
+# function with
+#
+# workers: the number of worker processes to use (1 does the
+# work in the current process)
+#
+# The function returns a list of the function's results in the
+# same order as 'arguments' whichever worker produced them
+#
+
+def starmap(function, arguments, workers=1):
+
+    arguments = list(arguments)
+
+    if workers <= 1 or len(arguments) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return [function(*args) for args in arguments]
+
+    with multiprocessing.get_context('fork').Pool(min(workers, len(arguments))) as pool:
+        return pool.starmap(function, arguments, chunksize=1)
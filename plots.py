@@ -0,0 +1,361 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: plots.py
+#
+#   The graphs drawn by 'sentiment.py', 'wordcount.py' and
+#   'embeds.py' -- each function draws one graph from the data
+#   it is given and saves it in a file
+#
+#   The functions are queued and called by 'render.py' (in
+#   worker processes with the 'workers' option) so they are
+#   kept in this module rather than in the scripts
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   The approach taken in this module (and some parts of the
+#   code) are based on class lectures and notes from the
+#   CEU Digital Tools course for BA students in the 2020-21
+#   academic year.
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import numpy as np
+import networkx as nx
+import matplotlib.pyplot as plt
+import matplotlib.gridspec as gridspec
+from wordcloud import WordCloud
+
+#
+# Plot valence, arousal and dominance graphs next to each other in
+# a single graph
+#
+# Function takes two arguments:
+#
+# filename: filename and path to save the graph
+#
+# scores: a data frame with 'valence', 'arousal' and 'dominance'
+# columns of tweet scores
+#
+
+def sentiment_graph(filename, scores):
+
+    fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(20,4))
+    ax[0].plot(list(scores['valence']))
+    ax[0].set_title('Valence')
+    ax[1].plot(list(scores['arousal']))
+    ax[1].set_title('Arousal')
+    ax[2].plot(list(scores['dominance']))
+    ax[2].set_title('Dominance')
+    plt.savefig(filename)
+
+#
+# Plot rolling average graphs for valence, arousal and dominance
+# next to each other in a single graph
+#
+# Function takes three arguments:
+#
+# filename: filename and path to save the graph
+#
+# scores: a data frame with 'valence', 'arousal' and 'dominance'
+# columns of tweet scores and '<metric>_rolling_<window>' columns
+# of their rolling averages
+#
+# window: the number of tweets in the rolling average window
+#
+
+def rolling_graph(filename, scores, window):
+
+    label = str(window) + '-day rolling avg'
+
+    fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(20,4))
+
+    for position, metric in enumerate(['valence', 'arousal', 'dominance']):
+        ax[position].plot(scores[metric], data = scores, label = metric.capitalize())
+        ax[position].plot(scores[metric + '_rolling_' + str(window)], data = scores, label = label)
+        ax[position].set_title(metric.capitalize())
+        ax[position].legend()
+
+    plt.savefig(filename)
+
+#
+# Plot a sentiment time series graph of the whole corpus
+#
+# Function takes five arguments:
+#
+# filename: filename and path to save the graph
+#
+# sent_tseries: the time series of the metric's average score
+#
+# metric: 'valence', 'arousal' or 'dominance'
+#
+# win_size: the window size of the time series
+#
+# win_jump: the jump size of the time series
+#
+
+def timeseries_graph(filename, sent_tseries, metric, win_size, win_jump):
+
+    xplot = np.linspace(0, 1, len(sent_tseries) + 1)[1:] * 100
+    yplot = sent_tseries
+
+    plt.plot(xplot, yplot)
+
+    plt.xlabel('Progress through Tweets (Window: ' + str(win_size) + ', Jump: ' + str(win_jump) + ')')
+    plt.ylabel('Average ' + metric)
+
+    plt.savefig(filename)
+
+#
+# Plot a grid of sentiment time series graphs of the whole corpus for
+# different jump and window sizes
+#
+# Function takes five arguments:
+#
+# filename: filename and path to save the graph
+#
+# series: a dictionary of the time series with a (jump size, window
+# size) tuple as the key
+#
+# metric: 'valence', 'arousal' or 'dominance'
+#
+# win_jump_vals: the list of jump sizes (one row each)
+#
+# win_size_vals: the list of window sizes (one column each)
+#
+
+def sensitivity_graph(filename, series, metric, win_jump_vals, win_size_vals):
+
+    fig = plt.figure(figsize=(12, 8))  # Set up figure
+    grid = gridspec.GridSpec(len(win_jump_vals), len(win_size_vals), hspace=0.7, wspace=0.4)  # Set up a grid based on length of lists above
+
+    #
+    # Loop through jump sizes and window sizes
+    #
+
+    for jump_pos, win_jump in enumerate(win_jump_vals):
+
+        for size_pos, win_size in enumerate(win_size_vals):
+
+            sent_tseries = series[(win_jump, win_size)]
+
+            #
+            # Add the time series graph to the grid
+            #
+
+            ax = plt.subplot(grid[jump_pos, size_pos])
+
+            xplot = np.linspace(0, 1, len(sent_tseries) + 1)[1:] * 100  # x-axis: percentage of corpus
+            yplot = sent_tseries  # y-axis: sentiment time series
+
+            plt.plot(xplot, yplot)  # plot time series
+
+            #
+            # Add title and labels
+            #
+
+            plt.title('window jump = {}\nwindow size = {}'.format(win_jump, win_size))
+
+            if jump_pos == len(win_jump_vals):
+
+                #
+                # Only label column at the very bottom of the grid -- not in every graph
+                #
+                # We check this by comparing the current position in the list to the length
+                # of the list -- make sure we are at the list entry
+                #
+
+                plt.xlabel('percentage of tweets')  # axis labels
+
+            if size_pos == 0:
+
+                #
+                # Only label the rows at the very left of the grid -- not in every graph
+                #
+
+                plt.ylabel('average\n' + metric)
+
+    plt.savefig(filename)
+
+#
+# Plot a histogram (bar chart) of word counts
+#
+# Function takes two arguments:
+#
+# filename: filename and path to save the graph
+#
+# counts: a Pandas series of word counts indexed by word in the
+# order to draw them
+#
+
+def histogram_graph(filename, counts):
+
+    plt.figure(figsize=(75,50))
+    counts.plot.bar()
+    plt.xlabel('Words')
+    plt.ylabel('Word count')
+    plt.savefig(filename)
+
+#
+# Plot a word cloud of max 30 words
+#
+# Function takes two arguments:
+#
+# filename: filename and path to save the graph
+#
+# frequencies: a dictionary of words and their frequencies
+#
+
+def wordcloud_graph(filename, frequencies):
+
+    wordcloud = WordCloud(max_font_size=50, max_words=30, background_color="white").generate_from_frequencies(frequencies)
+    plt.figure()
+    plt.imshow(wordcloud, interpolation="bicubic")
+    plt.axis("off")
+    plt.savefig(filename)
+
+#
+# Plot a word network graph
+#
+# Function takes six arguments:
+#
+# filename: filename and path to save the graph
+#
+# net: the networkx object of the network to graph
+#
+# thres: threshold value to limit the graph to only
+# nodes with similarity values greater than the threshold
+#
+# node_pos: the position of each node (see 'layouts.py')
+#
+# node_options: options to pass to draw_network_nodes
+#
+# label_options: options to pass to draw_network_labels
+# (defaults to 'None')
+#
+
+def network_graph(filename, net, thres, node_pos, node_options, label_options=None):
+
+    #
+    # Initalise lists to hold list of edges, weights and widths
+    #
+
+    edgelist = []
+    weights = []
+    widths = []
+
+    #
+    # Loop through links and weights and add eddges and weights
+    # to the lists above if their weight exceeeds the threshold
+    #
+
+    for i, j, w in net.edges.data('weight'):
+
+        if w > thres:
+            edgelist.append((i, j))
+            weights.append(w)
+
+    #
+    # Normalise weights based on max/min values in weights list
+    #
+
+    min_weight = min(weights)
+    max_weight = max(weights)
+
+    for w in weights:
+        widths.append(1 + (w - min_weight) / (max_weight - min_weight))
+
+    #
+    # Initialise figure in matplotlib -- set the size of image driven by number
+    # of edges with a simplistic formula with an upper limit on pixels
+    #
+
+    fig_width = int(len(edgelist) / 5)
+    fig_height = int(fig_width * 0.8)
+
+    if (fig_width > 78):
+        fig_width = 78
+        fig_height = 60
+
+    if (fig_width < 26):
+        fig_width = 26
+        fig_height = 20
+
+    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+
+    #
+    # Draw nodes with specified options
+    #
+
+    node_draw = nx.draw_networkx_nodes(net, node_pos, **node_options)
+
+    #
+    # Draw labels if 'label_options' exists
+    #
+
+    if label_options:
+        label_draw = nx.draw_networkx_labels(net, node_pos, **label_options)
+
+    #
+    # Set edge drawing options
+    #
+
+    edge_options = {
+        'edgelist': edgelist,
+        'width': widths,
+        'edge_color': weights,
+        'edge_cmap': plt.get_cmap('winter_r'),
+        'edge_vmin': min_weight,
+        'edge_vmax': max_weight,
+    }
+
+    #
+    # Draw edges with specified options
+    #
+
+    edge_draw = nx.draw_networkx_edges(net, node_pos, **edge_options)
+
+    #
+    # Draw colorbar with weight values
+    #
+
+    cbar = plt.colorbar(edge_draw, shrink=0.5, aspect=10)
+    cbar.set_label('word2vec similarity')
+
+    #
+    # Save the graph to the specified file
+    #
+
+    plt.savefig(filename)
@@ -69,8 +69,8 @@ recipes = {} # Do not edit/remove -- this is not configurable
 #
 # recipes['<key>']['actions'] = ['<action1>','<action2>',...]
 #
-# If using the 'compare', 'embeds, 'sentiment', 'wordcount'
-# or 'tfidf' actions, specify the dates to analyse as YYYY
+# If using the 'compare', 'compare-all', 'embeds, 'sentiment',
+# 'wordcount' or 'tfidf' actions, specify the dates to analyse as YYYY
 # or YYYY-MM:
 #
 # recipes['<key>']['dates'] = <YYYY or YYYY-MM>
@@ -80,6 +80,11 @@ recipes = {} # Do not edit/remove -- this is not configurable
 #
 # recipes['<key>']['project2'] = <project2>
 #
+# If using the 'compare-all' action, specify the list of other
+# projects to compare with:
+#
+# recipes['<key>']['projects'] = [<project2>, <project3>, ...]
+#
 # If using the 'embeds' action, specify the threshold for the
 # network graph:
 #
@@ -89,6 +94,15 @@ recipes = {} # Do not edit/remove -- this is not configurable
 # 'valence', 'arousal' or 'dominance':
 #
 # recipes['<key>']['metric'] = <metric>
+#
+# Optionally, specify options for the actions in the recipe (the
+# same options as the '--name' arguments of 'twz.py'):
+#
+# recipes['<key>']['options'] = {'<name>': <value>, ...}
+#
+# For instance, to only clean new or changed raw files:
+#
+# recipes['<key>']['options'] = {'incremental': True}
 
 # Sample Recipe configure to scrape a sample project's timeline,
 # clean and dedup
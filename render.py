@@ -0,0 +1,128 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: render.py
+#
+#   Deferred rendering of graphs -- rather than drawing each
+#   graph as soon as its data is ready, scripts queue a plot
+#   (a drawing function from 'plots.py', the file to save it
+#   in and the data to draw) with 'add_plot' and then render
+#   every queued plot at the end with 'render_plots'
+#
+#   Plots are rendered with matplotlib's non-interactive 'Agg'
+#   backend, in parallel in worker processes with the 'workers'
+#   option (see 'parallel.py'), and not at all with the
+#   'no-plots' option so batch runs only write the data files
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import matplotlib
+import matplotlib.pyplot as plt
+import parallel
+
+#
+# The queue of plots waiting to be rendered -- each plot is a tuple
+# of the drawing function, the file name and the function's other
+# arguments
+#
+
+plots = []
+
+#
+# Add a plot to the queue
+#
+# Function takes two arguments and any number of others:
+#
+# function: the function to draw the plot -- it is called with the
+# file name followed by the other arguments and must save the plot
+# in the file (it must be defined in a module such as 'plots.py' so
+# worker processes can call it)
+#
+# filename: the file to save the plot in
+#
+# The other arguments are the data to draw -- they are passed to
+# worker processes so should only hold what the plot needs
+#
+
+def add_plot(function, filename, *args):
+
+    plots.append((function, filename, args))
+
+#
+# Render one plot
+#
+# Function takes three arguments:
+#
+# function: the function to draw the plot
+#
+# filename: the file to save the plot in
+#
+# args: the function's other arguments
+#
+# Any figures left open by the function are closed once it is done
+#
+
+def render_plot(function, filename, args):
+
+    matplotlib.use('Agg')
+
+    function(filename, *args)
+
+    plt.close('all')
+
+#
+# Render every plot in the queue and empty it
+#
+# Function takes two arguments:
+#
+# workers: the number of worker processes to render plots in
+# (defaults to 1 to render them in the current process)
+#
+# skip: if True, empty the queue without rendering anything
+# (defaults to False)
+#
+
+def render_plots(workers=1, skip=False):
+
+    queued = list(plots)
+    plots.clear()
+
+    if skip:
+        print('Skipping ' + str(len(queued)) + ' plots')
+        return
+
+    print('Rendering ' + str(len(queued)) + ' plots')
+
+    parallel.starmap(render_plot, queued, workers=workers)
@@ -0,0 +1,306 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: scoring.py
+#
+#   Lexicon scoring engine used by 'sentiment.py' to score
+#   tweets against the Warriner sentiment lexicon
+#
+#   The lexicon is loaded once into:
+#
+#   1. A dictionary mapping each term to its row number
+#
+#   2. A NumPy array of scores with one row per term and one
+#      column per metric (valence, arousal and dominance)
+#
+#   All tweets are then scored in a single batched pass by
+#   building the document-term incidence of the tweets (the
+#   lexicon rows of every word in every tweet, laid out like a
+#   sparse CSR matrix) and summing the matching score rows for
+#   all tweets at once
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import numpy as np
+import pandas as pd
+
+#
+# The lexicon columns holding the mean valence, arousal and
+# dominance scores -- in that order
+#
+
+METRIC_COLUMNS = ['V.Mean.Sum', 'A.Mean.Sum', 'D.Mean.Sum']
+
+#
+# Load a sentiment lexicon into a term index and score array
+#
+# Function takes two arguments:
+#
+# path: the path to the lexicon CSV file
+#
+# columns: the list of lexicon columns to load scores for
+# (defaults to the valence, arousal and dominance means)
+#
+# The function returns a dictionary with three entries:
+#
+# terms: a dictionary mapping each term to its row in 'scores'
+#
+# columns: the list of columns loaded
+#
+# scores: a NumPy array with one row per term and one column
+# per entry in 'columns'
+#
+
+def load_lexicon(path, columns=METRIC_COLUMNS):
+
+    #
+    # Read the lexicon the same way the analysis scripts always
+    # have so that the same terms are recognised
+    #
+
+    frame = pd.read_csv(path, index_col='Word')
+
+    #
+    # Drop any rows pandas could not read a term for (the term
+    # 'null' is read as a missing value) -- these rows never
+    # matched a word in a tweet before either
+    #
+
+    frame = frame[frame.index.notna()]
+
+    #
+    # Build the term index and the score array
+    #
+
+    terms = {term: row for row, term in enumerate(frame.index)}
+    scores = frame[columns].to_numpy(dtype=np.float64)
+
+    return {'terms': terms, 'columns': list(columns), 'scores': scores}
+
+#
+# Build the document-term incidence of a list of documents
+#
+# Function takes two arguments:
+#
+# documents: a list of documents where each document is a list
+# of words (for instance, the lemmas of a tweet)
+#
+# lexicon: a lexicon loaded with 'load_lexicon'
+#
+# The function returns the incidence in the same layout as a
+# sparse CSR matrix -- two NumPy arrays:
+#
+# indices: the lexicon row of every word found in the lexicon,
+# document after document, in the order the words appear
+#
+# indptr: where each document's entries start and end in
+# 'indices' (document i is indices[indptr[i]:indptr[i + 1]])
+#
+# Words not in the lexicon are ignored
+#
+
+def document_terms(documents, lexicon):
+
+    terms = lexicon['terms']
+
+    indices = []
+    indptr = [0]
+
+    for document in documents:
+        indices.extend(terms[word] for word in document if word in terms)
+        indptr.append(len(indices))
+
+    return np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)
+
+#
+# Score a list of documents against a lexicon in one pass
+#
+# Function takes two arguments:
+#
+# documents: a list of documents where each document is a list
+# of words (for instance, the lemmas of a tweet)
+#
+# lexicon: a lexicon loaded with 'load_lexicon'
+#
+# The function returns a NumPy array with one row per document
+# and one column per lexicon column holding the average score
+# of the document's words found in the lexicon (each occurrence
+# of a word counts) or NaN if no words were found
+#
+
+def score_documents(documents, lexicon):
+
+    indices, indptr = document_terms(documents, lexicon)
+
+    #
+    # Look up the scores of every word found in one go and work out
+    # how many words were found in each document
+    #
+
+    values = lexicon['scores'][indices]
+    counts = np.diff(indptr)
+
+    means = np.full((len(documents), len(lexicon['columns'])), np.nan)
+
+    #
+    # Sum the scores of documents with the same number of words found
+    # together -- each group is a block of (documents x metrics x words)
+    # summed along the words
+    #
+    # Summing each document's words as one contiguous run means NumPy
+    # adds them up in exactly the same order as the old per-tweet
+    # pandas mean did, so the rounded averages are identical (a plain
+    # matrix product adds them in a different order which can tip an
+    # average sitting on a rounding boundary the other way)
+    #
+
+    for count in np.unique(counts[counts > 0]):
+        rows = np.flatnonzero(counts == count)
+        positions = indptr[rows][:, None] + np.arange(count)
+        block = np.ascontiguousarray(values[positions].transpose(0, 2, 1))
+        means[rows] = block.sum(axis=2) / count
+
+    return means
+
+#
+# Build the prefix sums used to average scores over windows of a
+# corpus
+#
+# Function takes two arguments:
+#
+# corpus: the complete text to process as a list of words
+#
+# lexicon: a lexicon loaded with 'load_lexicon'
+#
+# The corpus is mapped to a score array (one row per word, zero
+# for words not in the lexicon) and a hit mask (one where the
+# word is in the lexicon) once, and both are turned into
+# cumulative sums with a leading zero so the total of any run
+# of words is the difference of two entries
+#
+# Lexicon scores are given to two decimal places so the sums
+# are kept in hundredths as integers which keeps them exact
+# however long the corpus is
+#
+# The function returns a dictionary with three entries:
+#
+# columns: the list of lexicon columns (as in the lexicon)
+#
+# sums: the cumulative score sums in hundredths with one row
+# per position in the corpus (plus the leading zero) and one
+# column per entry in 'columns'
+#
+# hits: the cumulative count of words found in the lexicon
+#
+
+def corpus_prefix(corpus, lexicon):
+
+    terms = lexicon['terms']
+
+    #
+    # Map the corpus to lexicon rows (-1 for words not found) and
+    # build the hit mask and score array from them
+    #
+
+    rows = np.fromiter((terms.get(word, -1) for word in corpus), dtype=np.int64, count=len(corpus))
+    mask = rows >= 0
+
+    cents = np.rint(lexicon['scores'] * 100).astype(np.int64)
+    scores = np.zeros((len(corpus), len(lexicon['columns'])), dtype=np.int64)
+    scores[mask] = cents[rows[mask]]
+
+    #
+    # Build the cumulative sums with a leading zero
+    #
+
+    sums = np.zeros((len(corpus) + 1, len(lexicon['columns'])), dtype=np.int64)
+    np.cumsum(scores, axis=0, out=sums[1:])
+
+    hits = np.zeros(len(corpus) + 1, dtype=np.int64)
+    np.cumsum(mask, out=hits[1:])
+
+    return {'columns': lexicon['columns'], 'sums': sums, 'hits': hits}
+
+#
+# Calculate a sentiment time series from corpus prefix sums
+#
+# Function takes four arguments:
+#
+# prefix: prefix sums built with 'corpus_prefix'
+#
+# label: the name of the lexicon column containing the
+# sentiment scores we want to use
+#
+# win_jump: the jump size to use in traversing the corpus
+# which defaults to 100 words
+#
+# win_size: the window size for each window to use in calculating
+# sentiment scores which defaults to 100 words
+#
+# Windows start every 'win_jump' words and only complete windows
+# are used -- the average for each window is the difference of
+# two prefix sums divided by the difference of two hit counts
+# so every window costs the same however big it is and the
+# same prefix sums can be reused for any window and jump size
+#
+# The function returns a NumPy array with the average score of
+# each window or NaN where a window has no words in the lexicon
+#
+
+def windowed_means(prefix, label, win_jump=100, win_size=100):
+
+    column = prefix['columns'].index(label)
+    length = len(prefix['hits']) - 1
+
+    #
+    # Work out where the complete windows start and end
+    #
+
+    starts = np.arange(0, max(length - win_size + 1, 0), win_jump)
+    ends = starts + win_size
+
+    #
+    # Take the differences of the prefix sums to get each window's
+    # total score and number of words found
+    #
+
+    totals = prefix['sums'][ends, column] - prefix['sums'][starts, column]
+    counts = prefix['hits'][ends] - prefix['hits'][starts]
+
+    means = np.full(len(starts), np.nan)
+    found = counts > 0
+    means[found] = totals[found] / counts[found] / 100
+
+    return means
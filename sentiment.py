@@ -25,6 +25,10 @@
 #      dominance over the entire tweet set as a single text
 #      corpus of merged tweets in chronological order
 #
+#   The scores and time series are saved as .csv files and the
+#   graphs are rendered at the end (see 'render.py') -- with the
+#   'no-plots' option only the .csv files are written
+#
 #   Make sure 'dedup.py' has been run on your project's tweet
 #   data before calling this script
 #
@@ -57,144 +61,26 @@
 ################################################################
 
 import pandas as pd
-import re
-import csv
-import spacy
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
+import scoring
+import render
+import plots
+import store
+import tokenise
 import config
 
-#
-# Utility function to calculate average sentiment
-# for a block of text
-#
-# Function takes three arguments:
-#
-# text: the window of text to process
-#
-# lexicon: the sentiment data lexicon
-#
-# label: the name of the column in the lexicon containing
-# the sentiment scores we want to use
-#
-
-def avg_sentiment(text, lexicon, label):
-
-    #
-    #  Create variables to hold a sum and counter
-    #
-
-    sent_sum, sent_count = 0, 0
-
-    #
-    # Loop through words in the text windows
-    #
-
-    for word in text:
-
-        #
-        # Check if the word is in the sentiment data
-        # lexicon
-        #
-
-        if word in lexicon.index:
-
-            #
-            # If the word is in the lexicon, add its
-            # score to the sum
-            #
-            # Also increment the counter so we can calculate
-            # the average later
-            #
-
-            sent_sum += lexicon.loc[word, label]
-            sent_count += 1
-
-    #
-    # Check if the counter is greater than zero (i.e. we found
-    # words to score
-    #
-
-    if sent_count:
-
-        #
-        # If we have words, calculate the score
-        #
-
-        avg_sent = sent_sum / sent_count
-
-    else:
-
-        #
-        # If no words, return a non-number (NaN)
-        #
-
-        avg_sent = np.nan
-
-    return avg_sent
-
-#
-# Utility function to calculate sentiment time
-# series for a corpus of text
-#
-# Function takes three arguments:
-#
-# corpus: the complete text to process
-#
-# lexicon: the sentiment data lexicon
-#
-# label: the name of the column in the lexicon containing
-# the sentiment scores we want to use
-#
-# win_jump: the jump size to use in traversing the corpus
-# which defaults to 100 words
-#
-# win_size: the window size for each window to use in calculating
-# sentiment scores which defaults to 100 words
-#
-
-def sentiment_tseries(corpus, lexicon, label, win_jump=100, win_size=100):
-
-    #
-    # Create a list to hold the time series data
-    #
-
-    sent_tseries = []
-
-    #
-    # Iterate through the words in the corpus in steps matching the
-    # jump size (win_jump)
-    #
-
-    for start_pos in range(0, len(corpus), win_jump):
-
-        #
-        # Get a window starting at the current position of the specified
-        # window size
-        #
-
-        text = corpus[start_pos: start_pos + win_size]
-
-        #
-        # If the current text window is a complete window then calculate
-        # average sentiment and add it to the time series data list
-        #
-
-        if len(text) == win_size:
-            avg_sent = avg_sentiment(text, lexicon, label)
-            sent_tseries.append(avg_sent)
-
-    return sent_tseries
-
 #
 # Define paths for analysis files.
 #
 # The 'analysis' subdirectory stores various data files generated
 # in the analysis process including generated graphs etc
 #
+# The 'cache' subdirectory stores data kept between runs to save
+# work
+#
 
 analysispath = config.basepath + project['key'] + '/analysis/'
+cachepath = config.basepath + project['key'] + '/cache/'
 
 #
 # Path to sentiment data Warriner et al's project to extend
@@ -214,94 +100,62 @@ analysispath = config.basepath + project['key'] + '/analysis/'
 warriner = './lexicons/warriner.csv'
 
 #
-#   Read in the sentiment data into a DataFrame (DW Zhou sentiment data)
+# Load the tweets in the target year from the project's tweet store
+# and create tweets data frame -- the word columns come back as
+# lists of words
 #
 
-sentiment = pd.read_csv(warriner, index_col='Word')
+tweets = pd.DataFrame(store.load(analysispath, store.COLUMNS, year))
 
 #
-# Create list to hold list of tweet words
+# Get the number of processes to use -- spaCy uses this many to
+# process tweets and graphs are rendered in this many worker
+# processes (one by default)
 #
 
-tweets_list = []
+workers = int(options.get('workers', 1))
 
 #
-# Open 'alltweets_dedup.csv' for reading
+# Check if we are only writing data files and not rendering graphs
+# (the '--no-plots' option)
 #
 
-with open(analysispath + 'alltweets_dedup.csv', newline='') as csvfile:
-
-    #
-    # Read the contents of the file into a CSV DictReader
-    #
-
-    reader = csv.DictReader(csvfile)
-
-    #
-    # Iterate through the rows
-    #
-
-    for row in reader:
-
-        #
-        # Check if the tweet's date is in the target year
-        #
-
-        if row['created_at'].startswith(year):
-
-            #
-            # Add the row to the tweets list
-            #
-
-            tweets_list.append(row)
+no_plots = options.get('no-plots', False)
 
 #
-# Create tweets data frame
+# Update the user since the script takes a while
 #
 
-tweets = pd.DataFrame(tweets_list)
+print('Calculate valence, arousal and dominance')
 
 #
-# Create lists to store valence, arousal and dominance of the tweet set
+# Load the lexicon into the scoring engine -- this gives us a term
+# index and an array of valence, arousal and dominance scores
 #
 
-valence = []
-arousal = []
-dominance = []
+lexicon = scoring.load_lexicon(warriner)
 
 #
-# Update the user since the script takes a while
+# Get the lemmas of each tweet as a list of words
 #
 
-print('Calculate valence, arousal and dominance')
+documents = list(tweets['lemmas'])
 
 #
-# Iterate through tweets looking at lemmas columns
-# in order to calculate valence, arousal, dominance
+# Score all the tweets in one pass -- we get back one row per tweet
+# with the average valence, arousal and dominance of the tweet's words
+# found in the lexicon (or NaN if there were none)
 #
 
-for tweet in list(tweets['lemmas']):
-
-    #
-    # Create dataframe from list of words n tweet
-    #
-
-    tweet_words = pd.DataFrame(eval(tweet), columns=['Word'])
-
-    #
-    # Calculate sentiment values for words
-    #
-
-    result = pd.merge(tweet_words, sentiment, on="Word")
+scores = scoring.score_documents(documents, lexicon).round(2)
 
-    #
-    # Append average values to two decimal points to empty lists created above
-    # for valence, arousal and dominance
-    #
+#
+# Create lists to store valence, arousal and dominance of the tweet set
+#
 
-    valence.append(round(result[["V.Mean.Sum"]].mean(), 2))
-    arousal.append(round(result[["A.Mean.Sum"]].mean(), 2))
-    dominance.append(round(result[["D.Mean.Sum"]].mean(), 2))
+valence = list(scores[:, 0])
+arousal = list(scores[:, 1])
+dominance = list(scores[:, 2])
 
 #
 # Store the scores for the tweets in the tweets DataFrame
@@ -346,168 +200,40 @@ tweets['dominance_rolling_10'] = tweets.dominance.rolling(10).mean()
 tweets.to_csv(analysispath + 'alltweets_sentiment_' + year + '.csv')
 
 #
-# Update the user since the script takes a while
+# Queue the graphs of valence, arousal and dominance and of their 3, 5
+# and 10 tweet rolling averages (each with the three next to each
+# other in a single PNG) -- they are rendered at the end of the script
+# (see 'render.py') and only need the scores, not the whole tweets
 #
 
-print('Generate valence, arousal and dominance graphs')
+sentiment_scores = tweets[['valence', 'arousal', 'dominance',
+                           'valence_rolling_3', 'valence_rolling_5', 'valence_rolling_10',
+                           'arousal_rolling_3', 'arousal_rolling_5', 'arousal_rolling_10',
+                           'dominance_rolling_3', 'dominance_rolling_5', 'dominance_rolling_10']]
 
-#
-# Plot valence, arousal and dominance graphs
-# next to each other in a single PNG
-#
-
-fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(20,4))
-ax[0].plot(valence)
-ax[0].set_title('Valence')
-ax[1].plot(arousal)
-ax[1].set_title('Arousal')
-ax[2].plot(dominance)
-ax[2].set_title('Dominance')
-plt.savefig(analysispath + 'sentiment_' + year + '.png')
-plt.close()
-
-#
-# Update the user since the script takes a while
-#
-
-print('Calculate valence, arousal and dominance three-day rolling average graph')
-
-#
-# Plot three-day rolling average graphs for valence,
-# arousal and dominance in a single graph
-#
-
-fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(20,4))
-ax[0].plot(tweets['valence'], data = tweets, label = 'Valence')
-ax[0].plot(tweets['valence_rolling_3'], data = tweets, label = '3-day rolling avg')
-ax[0].set_title('Valence')
-ax[0].legend()
-
-ax[1].plot(tweets['arousal'], data = tweets, label = 'Arousal')
-ax[1].plot(tweets['arousal_rolling_3'], data = tweets, label = '3-day rolling avg')
-ax[1].set_title('Arousal')
-ax[1].legend()
-
-ax[2].plot(tweets['dominance'], data = tweets, label = 'Dominance')
-ax[2].plot(tweets['dominance_rolling_3'], data = tweets, label = '3-day rolling avg')
-ax[2].set_title('Dominance')
-ax[2].legend()
-plt.savefig(analysispath + 'sentiment_rolling_3_' + year + '.png')
-plt.close()
-
-#
-# Update the user since the script takes a while
-#
+render.add_plot(plots.sentiment_graph, analysispath + 'sentiment_' + year + '.png', sentiment_scores)
 
-print('Calculate valence, arousal and dominance five-day rolling average graph')
+for window in [3, 5, 10]:
+    render.add_plot(plots.rolling_graph, analysispath + 'sentiment_rolling_' + str(window) + '_' + year + '.png', sentiment_scores, window)
 
 #
-# Plot five day rolling average graphs for valence,
-# arousal and dominance in a single graph
-#
-
-fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(20,4))
-ax[0].plot(tweets['valence'], data = tweets, label = 'Valence')
-ax[0].plot(tweets['valence_rolling_5'], data = tweets, label = '5-day rolling avg')
-ax[0].set_title('Valence')
-ax[0].legend()
-
-ax[1].plot(tweets['arousal'], data = tweets, label = 'Arousal')
-ax[1].plot(tweets['arousal_rolling_5'], data = tweets, label = '5-day rolling avg')
-ax[1].set_title('Arousal')
-ax[1].legend()
-
-ax[2].plot(tweets['dominance'], data = tweets, label = 'Dominance')
-ax[2].plot(tweets['dominance_rolling_5'], data = tweets, label = '5-day rolling avg')
-ax[2].set_title('Dominance')
-ax[2].legend()
-plt.savefig(analysispath + 'sentiment_rolling_5_' + year + '.png')
-plt.close()
-
-#
-# Update the user since the script takes a while
-#
-
-print('Calculate valence, arousal and dominance ten-day rolling average graph')
-
-#
-# Plot ten day rolling average graphs for valence,
-# arousal and dominance in a single graph
-#
-
-fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(20,4))
-ax[0].plot(tweets['valence'], data = tweets, label = 'Valence')
-ax[0].plot(tweets['valence_rolling_10'], data = tweets, label = '10-day rolling avg')
-ax[0].set_title('Valence')
-ax[0].legend()
-
-ax[1].plot(tweets['arousal'], data = tweets, label = 'Arousal')
-ax[1].plot(tweets['arousal_rolling_10'], data = tweets, label = '10-day rolling avg')
-ax[1].set_title('Arousal')
-ax[1].legend()
-
-ax[2].plot(tweets['dominance'], data = tweets, label = 'Dominance')
-ax[2].plot(tweets['dominance_rolling_10'], data = tweets, label = '10-day rolling avg')
-ax[2].set_title('Dominance')
-ax[2].legend()
-plt.savefig(analysispath + 'sentiment_rolling_10_' + year + '.png')
-plt.close()
-
-#
-# Let's load Spacy ready for the next analysis
-#
-# To use Spacy this way we first need to prepare for it:
-#
-# 1. Install spacy, for instance:
-#
-# conda install spacy
-#
-# 2. At the command prompt download the en_core_web_sm data set:
+# Get the lemmas of the full corpus of tweets in chronological order,
+# deleting stopwords -- they are loaded from the project's
+# 'cache/corpora' subdirectory if this period has already been through
+# spaCy (for 'sentiment' or 'compare') otherwise the tweets are
+# streamed through spaCy and cached -- see 'tokenise.py'
 #
-# python -m spacy download en_core_web_sm
-#
-
-nlp = spacy.load('en_core_web_sm')
-nlp.max_length = 2000000
-
-#
-# Let's create a corpus string to store the content of all tweets
-# in chronological order in a string to generate a sentiment time
+# This gives us a stream of lemmas to generate a sentiment time
 # series of valence on the whole corpus of tweets
 #
-# We start with reversing the order of the tweets and creating
-# a raw corpus string of all tweet content -- order is reversed
-# because our CSV is reverse chronological order
-#
-
-corpus_raw = ''
-
-for idx in reversed(tweets.index):
-    corpus_raw = corpus_raw + str(tweets.loc[idx, 'text']) + '\n'
-
-#
-# Remove extra white space, lowercase all words
-#
 
-corpus_re = re.sub( r'\W+', ' ', corpus_raw ).lower().strip()
-
-#
-# Create a Spacy object
-#
-
-corpus_nlp = nlp(corpus_re)
-
-#
-# Delete stopwords and lemmatise the full corpus
-#
-
-corpus = [w.lemma_ for w in corpus_nlp if nlp.vocab[w.text].is_stop == False if len(w) > 1]
+corpus = tokenise.load_corpus(analysispath, cachepath + 'corpora/', year, n_process=workers)
 
 #
 # Update the user since the script takes a while
 #
 
-print('Generate full corpus time series scores and graph for ' + metric)
+print('Generate full corpus time series scores for ' + metric)
 
 #
 # To get the right column we need to derive the column name from the chosen metric:
@@ -522,34 +248,38 @@ print('Generate full corpus time series scores and graph for ' + metric)
 metric_column = metric[0].upper() + '.Mean.Sum'
 
 #
-# Generate the sentiment time series data based on Valence Mean scores
-# from the warriner.csv sentiment lexicon data set
+# Map the corpus to lexicon scores once and build the prefix sums
+# we use to average any window of the corpus -- the same prefix
+# sums are reused for every window and jump size below
 #
 
-win_size = 500
-win_jump = 100
-sent_tseries = sentiment_tseries(corpus, sentiment, metric_column, win_jump=win_jump, win_size=win_size)
+prefix = scoring.corpus_prefix(corpus, lexicon)
 
 #
-# Plot the time series graph
+# Generate the sentiment time series data based on the chosen metric's
+# mean scores from the warriner.csv sentiment lexicon data set
 #
 
-xplot = np.linspace(0, 1, len(sent_tseries) + 1)[1:] * 100
-yplot = sent_tseries
+win_size = 500
+win_jump = 100
+sent_tseries = scoring.windowed_means(prefix, metric_column, win_jump=win_jump, win_size=win_size)
 
-plt.plot(xplot, yplot)
+#
+# Save the time series with the position of each window as a
+# percentage of the corpus and queue its graph
+#
 
-plt.xlabel('Progress through Tweets (Window: ' + str(win_size) + ', Jump: ' + str(win_jump) + ')')
-plt.ylabel('Average ' + metric)
+pd.DataFrame({'percentage': np.linspace(0, 1, len(sent_tseries) + 1)[1:] * 100,
+              metric: sent_tseries}).to_csv(analysispath + metric + '_timeseries_' + year + '.csv', index=False)
 
-plt.savefig(analysispath + metric + '_timeseries_' + year + '.png')
-plt.close()
+render.add_plot(plots.timeseries_graph, analysispath + metric + '_timeseries_' + year + '.png',
+                sent_tseries, metric, win_size, win_jump)
 
 #
 # Update the user since the script takes a while
 #
 
-print('Generate comparative sensitivity analysis graph for ' + metric)
+print('Generate comparative sensitivity analysis scores for ' + metric)
 
 #
 # Supplement the time series with a comparative analysis
@@ -566,23 +296,20 @@ win_jump_vals = [10, 100, 1000]
 win_size_vals = [500, 1000, 2000, 5000]
 
 #
-# Prepare to plot a 3 x 3 grid of graphs for comparative analysis
+# Create objects to hold the time series for each jump and window size
+# and the rows of the .csv file they are saved in
 #
 
-fig = plt.figure(figsize=(12, 8))  # Set up figure
-grid = gridspec.GridSpec(len(win_jump_vals), len(win_size_vals), hspace=0.7, wspace=0.4)  # Set up a grid based on length of lists above
+series = {}
+rows = []
 
 #
-# Loop through jump sizes list
+# Loop through jump sizes and window sizes
 #
 
-for jump_pos, win_jump in enumerate(win_jump_vals):
+for win_jump in win_jump_vals:
 
-    #
-    # Loop through window sizes list
-    #
-
-    for size_pos, win_size in enumerate(win_size_vals):
+    for win_size in win_size_vals:
 
         #
         # Keep the user informed because this process takes a while
@@ -594,50 +321,26 @@ for jump_pos, win_jump in enumerate(win_jump_vals):
         # Calculate sentiment time series for the specified jump and window sizes
         #
 
-        sent_tseries = sentiment_tseries(corpus, sentiment, metric_column, win_jump=win_jump, win_size=win_size)
-
-        #
-        # Add the time series graph to the grid
-        #
-
-        ax = plt.subplot(grid[jump_pos, size_pos])
+        sent_tseries = scoring.windowed_means(prefix, metric_column, win_jump=win_jump, win_size=win_size)
 
-        xplot = np.linspace(0, 1, len(sent_tseries) + 1)[1:] * 100  # x-axis: percentage of corpus
-        yplot = sent_tseries  # y-axis: sentiment time series
+        series[(win_jump, win_size)] = sent_tseries
 
-        plt.plot(xplot, yplot)  # plot time series
+        for percentage, score in zip(np.linspace(0, 1, len(sent_tseries) + 1)[1:] * 100, sent_tseries):
+            rows.append((win_jump, win_size, percentage, score))
 
-        #
-        # Add title and labels
-        #
-
-        plt.title('window jump = {}\nwindow size = {}'.format(win_jump, win_size))
-
-        if jump_pos == len(win_jump_vals):
-
-            #
-            # Only label column at the very bottom of the grid -- not in every graph
-            #
-            # We check this by comparing the current position in the list to the length
-            # of the list -- make sure we are at the list entry
-            #
-
-            plt.xlabel('percentage of tweets')  # axis labels
-
-        if size_pos == 0:
+#
+# Save the time series and queue the grid of graphs (one row for each
+# jump size and one column for each window size)
+#
 
-            #
-            # Only label the rows at the very left of the grid -- not in every graph
-            #
-            # We check this by comparing the current position in the list to check it
-            # is the first entry in the list
-            #
+pd.DataFrame(rows, columns=['win_jump', 'win_size', 'percentage', metric]).to_csv(analysispath + metric + '_timeseries_sensitivity_' + year + '.csv', index=False)
 
-            plt.ylabel('average\n' + metric)
+render.add_plot(plots.sensitivity_graph, analysispath + metric + '_timeseries_sensitivity_' + year + '.png',
+                series, metric, win_jump_vals, win_size_vals)
 
 #
-# Save the completed grid of graphs
+# Render the queued graphs -- in parallel if we have more than one
+# worker -- unless we are only writing data files
 #
 
-plt.savefig(analysispath + metric + '_timeseries_sensitivity_' + year + '.png')
-plt.close()
+render.render_plots(workers, skip=no_plots)
@@ -0,0 +1,365 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: shifts.py
+#
+#   Word frequency tables and shift graphs used by 'compare.py'
+#   and 'compare-all.py'
+#
+#   Each project's word (type) frequencies for a period are
+#   kept in the 'frequencies' subdirectory of the project's
+#   'cache' directory (<period>.json) so a project compared
+#   with several others is only counted once -- the table is
+#   used as long as the period's corpus is the same (see
+#   'tokenise.py')
+#
+#   The shifts of a pair of projects are worked out in this
+#   module (rather than in the scripts) so pairs can be
+#   compared in parallel by worker processes
+#
+#   Each shift graph (or table of shift scores) is rendered
+#   once into the shared 'artifacts' directory under a name
+#   made from a hash of everything it is drawn from, and then
+#   linked into each project's 'analysis' directory -- so a
+#   graph saved in both projects is only drawn once, and not
+#   drawn at all if it is already there from an earlier run
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   The approach taken in this module (and some parts of the
+#   code) are based on class lectures and notes from the
+#   CEU Digital Tools course for BA students in the 2020-21
+#   academic year.
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import json
+import shutil
+import hashlib
+import importlib.metadata
+import collections as co
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+import shifterator as sh
+import tokenise
+import files
+
+#
+# The number of words to display in shift graphs
+#
+
+TOP_N = 50
+
+#
+# Sentiment shift settings:
+#
+# SENT_LEX: the sentiment lexicon (LabMT, included in Shifterator)
+#
+# SENT_REF: the (arbitrary) reference value for sentiment regimes
+#
+# SENT_INT: the interval of sentiment scores to leave out
+#
+
+SENT_LEX = 'labMT_English'
+SENT_REF = 5
+SENT_INT = [(4,6)]
+
+#
+# Get the word frequencies of a project's tweets in a period
+#
+# Function takes four arguments:
+#
+# analysispath: the project's 'analysis' directory
+#
+# cachepath: the project's 'cache' directory
+#
+# year: the period as YYYY or YYYY-MM
+#
+# n_process: the number of processes spaCy should use if the
+# period's lemmas need working out
+#
+# The frequencies are loaded from the cache if they are there
+# (and still match the period's corpus) otherwise they are
+# counted from the period's lemmas (see 'tokenise.load_corpus')
+# and cached
+#
+# The function returns a dictionary of words and their
+# frequencies from the most to the least frequent
+#
+
+def load_frequencies(analysispath, cachepath, year, n_process=1):
+
+    period = tokenise.period_texts(analysispath, year)
+    key = period[0]
+
+    filename = cachepath + 'frequencies/' + year + '.json'
+
+    if os.path.exists(filename):
+
+        with open(filename) as f:
+            cached = json.load(f)
+
+        if cached['key'] == key:
+            return dict(cached['frequencies'])
+
+    #
+    # Pass the period's key and texts on so they aren't read and hashed
+    # again
+    #
+
+    corpus = tokenise.load_corpus(analysispath, cachepath + 'corpora/', year, n_process, period=period)
+
+    frequencies = co.Counter(corpus).most_common()
+
+    os.makedirs(cachepath + 'frequencies/', exist_ok=True)
+
+    files.write_json(filename, {'key': key, 'frequencies': frequencies})
+
+    return dict(frequencies)
+
+#
+# Utility function to work out the name of an artifact
+#
+# Function takes four arguments:
+#
+# kind: what the artifact is (e.g. 'proportion.png')
+#
+# names: the keys of the reference and comparison projects
+#
+# frequencies: the word frequencies of the two projects
+#
+# year: the period as YYYY or YYYY-MM
+#
+# The name is a hash of the arguments, the shift settings and
+# the versions of Shifterator and matplotlib followed by the
+# file extension from 'kind'
+#
+
+def artifact_name(kind, names, frequencies, year):
+
+    h = hashlib.sha256()
+
+    h.update(json.dumps({'kind': kind,
+                         'names': list(names),
+                         'year': year,
+                         'top_n': TOP_N,
+                         'lexicon': SENT_LEX,
+                         'reference': SENT_REF,
+                         'stop_lens': SENT_INT,
+                         'shifterator': importlib.metadata.version('shifterator'),
+                         'matplotlib': matplotlib.__version__}).encode('utf-8'))
+
+    for freq in frequencies:
+        h.update(json.dumps(list(freq.items())).encode('utf-8'))
+
+    return h.hexdigest() + os.path.splitext(kind)[1]
+
+#
+# Render an artifact and place it in each project
+#
+# Function takes four arguments:
+#
+# artifactpath: the shared 'artifacts' directory
+#
+# name: the artifact's name (see 'artifact_name')
+#
+# render: a function which writes the artifact to the file name
+# it is given
+#
+# filenames: the list of files to place the artifact at
+#
+# The artifact is only rendered if it isn't already in the
+# 'artifacts' directory (see 'files.write_file'). Each file is
+# a hard link to the artifact, or a symbolic link if hard links
+# aren't possible (e.g. across drives), or a copy as a last resort
+#
+
+def place_artifact(artifactpath, name, render, filenames):
+
+    artifact = artifactpath + name
+
+    if not os.path.exists(artifact):
+
+        os.makedirs(artifactpath, exist_ok=True)
+
+        files.write_file(artifact, render)
+
+    for filename in filenames:
+
+        if os.path.lexists(filename):
+            os.remove(filename)
+
+        try:
+            os.link(artifact, filename)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(artifact), filename)
+            except OSError:
+                shutil.copyfile(artifact, filename)
+
+#
+# Utility function to write the shift scores of every word to a
+# .csv file
+#
+# Function takes two arguments:
+#
+# shift_object: the Shifterator shift object
+#
+# filename: the file to write
+#
+# Each row has a word, the difference in its relative frequency,
+# the difference in its score, its average relative frequency,
+# the difference of its average score from the reference value
+# and its contribution to the shift (its shift score) -- from the
+# largest contribution either way to the smallest
+#
+
+def write_shift_scores(shift_object, filename):
+
+    p_diff, s_diff, p_avg, s_ref_diff, shift_score = shift_object.get_shift_scores(details=True)
+
+    scores = pd.DataFrame({'p_diff': p_diff,
+                           's_diff': s_diff,
+                           'p_avg': p_avg,
+                           's_ref_diff': s_ref_diff,
+                           'shift_score': shift_score})
+
+    scores = scores.loc[sorted(shift_score, key=lambda t: (-abs(shift_score[t]), t))]
+    scores.index.name = 'type'
+
+    scores.to_csv(filename)
+
+#
+# Compare the word frequencies of two projects
+#
+# Function takes six arguments:
+#
+# names: the keys of the reference and comparison projects
+#
+# frequencies: the word frequencies of the two projects (see
+# 'load_frequencies')
+#
+# year: the period as YYYY or YYYY-MM (used in file names)
+#
+# paths: the list of directories to save the proportion and
+# sentiment shift graphs in
+#
+# artifactpath: the shared 'artifacts' directory the graphs are
+# rendered in (see 'place_artifact')
+#
+# data_only: if True, save the shift scores of every word as
+# tables instead of drawing the graphs (defaults to False)
+#
+# The graphs are saved as '<project>_<project2>_proportion_<year>.png'
+# and '<project>_<project2>_sentiment_<year>.png' in each directory
+# (or the tables as '.csv' files with the same names)
+#
+# The function returns a dictionary with the overall shifts:
+#
+# proportion: the share of word use which differs between the
+# projects (half the sum of the differences in the relative
+# frequency of each word -- 0 for the same frequencies and 1
+# for no words in common)
+#
+# sentiment: the average sentiment of the comparison project
+# less that of the reference project
+#
+
+def compare_pair(names, frequencies, year, paths, artifactpath, data_only=False):
+
+    pair = names[0] + '_' + names[1]
+    extension = '.csv' if data_only else '.png'
+
+    #
+    # Compute proportion shift object using shifterator
+    #
+
+    proportion_shift = sh.ProportionShift(type2freq_1=frequencies[0],
+                                          type2freq_2=frequencies[1])
+
+    proportion_shift.get_shift_scores()
+
+    #
+    # Utility function to draw the proportion shift graph -- the
+    # figure is closed once saved so comparing many pairs doesn't
+    # keep every figure open
+    #
+
+    def draw_proportion(filename):
+        proportion_shift.get_shift_graph(top_n=TOP_N,
+                                         system_names=list(names),
+                                         show_plot=False,
+                                         filename=filename,
+                                         title='Proportion Shift: ' + names[0] + ', ' + names[1])
+        plt.close('all')
+
+    place_artifact(artifactpath,
+                   artifact_name('proportion' + extension, names, frequencies, year),
+                   (lambda filename: write_shift_scores(proportion_shift, filename)) if data_only else draw_proportion,
+                   [path + pair + '_proportion_' + year + extension for path in paths])
+
+    #
+    # Compute sentiment shift object
+    #
+
+    sentiment_shift = sh.WeightedAvgShift(type2freq_1=frequencies[0],
+                                          type2freq_2=frequencies[1],
+                                          type2score_1=SENT_LEX,
+                                          reference_value=SENT_REF,
+                                          stop_lens=SENT_INT)
+
+    sentiment_shift.get_shift_scores()
+
+    #
+    # Utility function to draw the sentiment shift graph
+    #
+
+    def draw_sentiment(filename):
+        sentiment_shift.get_shift_graph(top_n=TOP_N, detailed=True,
+                                        system_names=list(names),
+                                        show_plot=False,
+                                        filename=filename,
+                                        title='Sentiment Shift: ' + names[0] + ', ' + names[1])
+        plt.close('all')
+
+    place_artifact(artifactpath,
+                   artifact_name('sentiment' + extension, names, frequencies, year),
+                   (lambda filename: write_shift_scores(sentiment_shift, filename)) if data_only else draw_sentiment,
+                   [path + pair + '_sentiment_' + year + extension for path in paths])
+
+    return {'proportion': sum(abs(p) for p in proportion_shift.type2p_diff.values()) / 2,
+            'sentiment': sentiment_shift.diff}
@@ -0,0 +1,463 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: similarity.py
+#
+#   Word similarity engine for 'embeds.py' -- works out the
+#   cosine similarity of every pair of words from their word
+#   vectors with NumPy matrix multiplication instead of one
+#   call per pair
+#
+#   The word vectors are normalised to a length of one once so
+#   the cosine similarity of two words is simply the dot
+#   product of their vectors. The similarities are worked out
+#   in square blocks of words so only one block of
+#   similarities is held in memory at a time however many
+#   words there are
+#
+#   There is also an approximate engine (random projection
+#   locality sensitive hashing) which only compares words whose
+#   vectors point in roughly the same direction -- it finds most
+#   of the pairs above a threshold in far less time than
+#   comparing every pair when there are many words
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import time
+import numpy as np
+
+#
+# Number of words in each block -- a block of similarities takes
+# BLOCK_SIZE x BLOCK_SIZE x 4 bytes (4 MB)
+#
+
+BLOCK_SIZE = 1024
+
+#
+# Default settings of the approximate engine:
+#
+# ANN_RECALL: the share of the pairs at the threshold we aim to
+# find (which sets the number of hash tables -- more tables find
+# more pairs but take longer)
+#
+# ANN_MAX_TABLES: the most hash tables we use unless asked for
+# more
+#
+# ANN_BUCKET: the average number of words we aim to have in each
+# bucket of a table (which sets the number of bits in each hash)
+#
+
+ANN_RECALL = 0.9
+ANN_MAX_TABLES = 256
+ANN_BUCKET = 32
+
+#
+# Normalise word vectors
+#
+# Function takes one argument:
+#
+# vectors: a NumPy array with one word vector per row
+#
+# The function returns a NumPy array of the vectors scaled to a
+# length of one (vectors of all zeros are left as they are)
+#
+
+def unit_vectors(vectors):
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return vectors / np.where(norms == 0, 1, norms)
+
+#
+# Work out word similarities block by block
+#
+# Function takes two arguments:
+#
+# unit: a NumPy array of normalised word vectors (from
+# 'unit_vectors')
+#
+# block: the number of words in each block
+#
+# The function yields a tuple for each block of the number of the
+# first word of its rows, the number of the first word of its
+# columns and a NumPy array of the similarities of those words --
+# only blocks on or above the diagonal are worked out since the
+# similarity of 'a' and 'b' is the same as that of 'b' and 'a'
+#
+
+def similarity_blocks(unit, block=BLOCK_SIZE):
+
+    for row in range(0, len(unit), block):
+        for column in range(row, len(unit), block):
+            yield row, column, unit[row:row + block] @ unit[column:column + block].T
+
+#
+# Find the pairs of words with a similarity above a threshold
+#
+# Function takes three arguments:
+#
+# unit: a NumPy array of normalised word vectors (from
+# 'unit_vectors')
+#
+# thres: the threshold (or None for every pair)
+#
+# block: the number of words in each block
+#
+# Each pair is only found once (the first word always comes
+# before the second)
+#
+# The function yields a tuple of NumPy arrays for each block --
+# the numbers of the first words, the numbers of the second words
+# and their similarities
+#
+
+def similar_pairs(unit, thres=None, block=BLOCK_SIZE):
+
+    for row, column, sims in similarity_blocks(unit, block):
+
+        #
+        # On the diagonal only keep the pairs above it (the pairs
+        # below are the same pairs the other way round and the
+        # diagonal is each word with itself)
+        #
+
+        if row == column:
+            keep = np.triu(np.ones(sims.shape, dtype=bool), 1)
+        else:
+            keep = np.ones(sims.shape, dtype=bool)
+
+        if thres is not None:
+            keep &= sims > thres
+
+        first, second = np.nonzero(keep)
+
+        yield first + row, second + column, sims[first, second]
+
+#
+# Utility function to get an empty set of pairs in the same form as
+# 'similar_pairs' gives them
+#
+
+def no_pairs():
+
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+#
+# Keep the most (or least) similar pairs
+#
+# Function takes four arguments:
+#
+# kept: the pairs kept so far as a tuple of NumPy arrays (the
+# numbers of the first words, the numbers of the second words and
+# their similarities -- start with 'no_pairs')
+#
+# pairs: a block of pairs in the same form (from 'similar_pairs')
+#
+# k: the number of pairs to keep
+#
+# largest: keep the most similar pairs if True, otherwise the least
+# similar
+#
+# Only the k pairs kept and the new block are looked at (with
+# 'argpartition', which finds the k most or least similar without
+# sorting them all) so memory use stays the same however many
+# pairs there are
+#
+# The function returns the k pairs kept (in no particular order)
+#
+
+def keep_extremes(kept, pairs, k, largest=True):
+
+    first, second, sims = [np.concatenate([old, new]) for old, new in zip(kept, pairs)]
+
+    if len(sims) > k:
+        chosen = np.argpartition(-sims if largest else sims, k - 1)[:k]
+        first, second, sims = first[chosen], second[chosen], sims[chosen]
+
+    return first, second, sims
+
+#
+# Sort pairs from most to least similar
+#
+# Function takes one argument:
+#
+# pairs: the pairs as a tuple of NumPy arrays (see 'keep_extremes')
+#
+# Pairs with the same similarity are sorted by the numbers of their
+# words
+#
+# The function returns the sorted pairs in the same form
+#
+
+def sort_pairs(pairs):
+
+    first, second, sims = pairs
+    order = np.lexsort((second, first, -sims))
+
+    return first[order], second[order], sims[order]
+
+#
+# Keep only each word's strongest links
+#
+# Function takes two arguments:
+#
+# pairs: pairs as a tuple of NumPy arrays (see 'keep_extremes')
+#
+# k: the number of most similar pairs to keep for each word
+#
+# A pair is kept if it is one of the k most similar pairs of
+# either of its words so every word keeps at least one pair
+#
+# The function returns the pairs kept in the same form (and in
+# the same order)
+#
+
+def nearest_pairs(pairs, k):
+
+    first, second, sims = pairs
+
+    if len(sims) == 0:
+        return pairs
+
+    #
+    # List each pair once for each of its words and sort by word and
+    # then from most to least similar -- a pair's rank for a word is
+    # its position in that word's run of pairs
+    #
+
+    words = np.concatenate([first, second])
+    order = np.lexsort((-np.concatenate([sims, sims]), words))
+
+    starts = np.r_[0, np.flatnonzero(np.diff(words[order])) + 1]
+    lengths = np.diff(np.r_[starts, len(order)])
+
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - np.repeat(starts, lengths)
+
+    keep = (ranks[:len(sims)] < k) | (ranks[len(sims):] < k)
+
+    return first[keep], second[keep], sims[keep]
+
+#
+# Utility function to work out the chance two words with a
+# similarity of 'thres' get the same hash in a table of 'bits' bits
+#
+# Two words whose vectors are at an angle 'a' fall on the same side
+# of a random hyperplane with probability 1 - a / pi
+#
+
+def collision_probability(thres, bits):
+
+    return (1 - np.arccos(np.clip(thres, -1, 1)) / np.pi) ** bits
+
+#
+# Work out the share of pairs the approximate engine is expected to
+# find
+#
+# Function takes three arguments:
+#
+# thres: the threshold
+#
+# tables: the number of hash tables
+#
+# bits: the number of bits in each hash
+#
+# A pair is found if its words get the same hash in any table (see
+# 'collision_probability')
+#
+# The function returns the expected share of pairs found with a
+# similarity of exactly the threshold -- pairs which are more
+# similar are more likely to be found so this is the lowest
+# expected recall
+#
+
+def expected_recall(thres, tables, bits):
+
+    return 1 - (1 - collision_probability(thres, bits)) ** tables
+
+#
+# Choose the settings of the approximate engine
+#
+# Function takes four arguments:
+#
+# count: the number of words
+#
+# thres: the threshold
+#
+# tables: the number of hash tables (or None to use enough to
+# expect to find ANN_RECALL of the pairs at the threshold, up to
+# ANN_MAX_TABLES)
+#
+# bits: the number of bits in each hash (or None to choose from
+# the number of words so buckets hold about ANN_BUCKET words)
+#
+# The function returns a tuple of the number of tables and bits
+#
+
+def ann_settings(count, thres, tables=None, bits=None):
+
+    if bits is None:
+        bits = max(1, int(np.ceil(np.log2(max(count, 1) / ANN_BUCKET))))
+
+    if tables is None:
+
+        p = collision_probability(thres, bits)
+
+        if p >= 1:
+            tables = 1
+        elif p <= 0:
+            tables = ANN_MAX_TABLES
+        else:
+            tables = int(min(ANN_MAX_TABLES, max(1, np.ceil(np.log(1 - ANN_RECALL) / np.log(1 - p)))))
+
+    return tables, bits
+
+#
+# Find the pairs of words with a similarity above a threshold with
+# the approximate engine
+#
+# Function takes five arguments:
+#
+# unit: a NumPy array of normalised word vectors (from
+# 'unit_vectors')
+#
+# thres: the threshold
+#
+# tables: the number of hash tables (or None to choose -- see
+# 'ann_settings')
+#
+# bits: the number of bits in each hash (or None to choose -- see
+# 'ann_settings')
+#
+# seed: seed for the random hyperplanes
+#
+# Each table hashes every word by which side of a number of
+# random hyperplanes its vector falls on -- words whose vectors
+# are close are likely to get the same hash -- and only words in
+# the same bucket are compared (exactly, with 'similar_pairs').
+# A pair found in more than one table is only kept once
+#
+# The function yields one tuple of NumPy arrays -- the numbers of
+# the first words, the numbers of the second words and their
+# similarities -- in the same form as 'similar_pairs'
+#
+
+def ann_pairs(unit, thres, tables=None, bits=None, seed=1):
+
+    count = len(unit)
+
+    tables, bits = ann_settings(count, thres, tables, bits)
+
+    rng = np.random.default_rng(seed)
+    powers = 1 << np.arange(bits, dtype=np.int64)
+
+    keys = []
+    values = []
+
+    for table in range(tables):
+
+        #
+        # Hash each word and sort the words by hash so the words of
+        # each bucket are next to each other
+        #
+
+        planes = rng.standard_normal((unit.shape[1], bits)).astype(np.float32)
+        codes = ((unit @ planes) > 0) @ powers
+
+        order = np.argsort(codes, kind='stable')
+        starts = np.flatnonzero(np.diff(codes[order])) + 1
+
+        for bucket in np.split(order, starts):
+
+            if len(bucket) < 2:
+                continue
+
+            bucket = np.sort(bucket)
+
+            for first, second, sims in similar_pairs(unit[bucket], thres):
+                keys.append(bucket[first].astype(np.int64) * count + bucket[second])
+                values.append(sims)
+
+    #
+    # Keep each pair once (in order of the first and then the second
+    # word)
+    #
+
+    if len(keys) == 0:
+        keys, values = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    else:
+        keys, values = np.concatenate(keys), np.concatenate(values)
+
+    keys, index = np.unique(keys, return_index=True)
+
+    yield keys // count, keys % count, values[index]
+
+#
+# Compare the approximate engine with the exact engine
+#
+# Takes the same arguments as 'ann_pairs'
+#
+# The function returns a dictionary with the number of pairs
+# above the threshold ('exact'), how many of them the approximate
+# engine found ('found'), the share found ('recall') and the
+# time each engine took in seconds ('exact_time' and 'ann_time')
+#
+
+def ann_recall(unit, thres, tables=None, bits=None, seed=1):
+
+    count = len(unit)
+
+    start = time.perf_counter()
+    exact = set()
+
+    for first, second, sims in similar_pairs(unit, thres):
+        exact.update((first.astype(np.int64) * count + second).tolist())
+
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = set()
+
+    for first, second, sims in ann_pairs(unit, thres, tables, bits, seed):
+        found.update((first * count + second).tolist())
+
+    ann_time = time.perf_counter() - start
+
+    matched = len(exact & found)
+
+    return {'exact': len(exact), 'found': matched,
+            'recall': matched / len(exact) if len(exact) > 0 else 1.0,
+            'exact_time': exact_time, 'ann_time': ann_time}
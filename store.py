@@ -0,0 +1,410 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: store.py
+#
+#   Columnar tweet store written by 'clean.py' alongside
+#   'alltweets.csv' and read by the analysis scripts instead
+#   of re-parsing 'alltweets_dedup.csv'
+#
+#   The store lives in the 'store' subdirectory of the
+#   project's 'analysis' directory and keeps each column in
+#   its own NumPy file so the analysis scripts only read the
+#   columns they need (memory-mapped):
+#
+#   - meta.json: number of tweets, store format and a build ID
+#     (new every time the store is written so anything worked
+#     out from the store can tell if it has been rebuilt)
+#
+#   - tweet_id.npy: tweet IDs as 64-bit integers
+#
+#   - created_at.npy: publication dates as NumPy datetimes
+#
+#   - date_order.npy / date_sorted.npy: the row numbers of the
+#     tweets sorted by publication date and the dates in that
+#     order -- an index which lets us find the tweets in a year
+#     or month with a binary search instead of checking every
+#     tweet
+#
+#   - text.bin / text_offsets.npy: cleansed tweet text as
+#     UTF-8 bytes one tweet after another and where each
+#     tweet starts and ends
+#
+#   - vocab.npy: every distinct word in the word columns
+#
+#   - words_ids.npy / words_offsets.npy (and the same for
+#     'stopwords' and 'lemmas'): the vocabulary number of each
+#     word one tweet after another and where each tweet's
+#     words start and end
+#
+#   Tweets are deduplicated on tweet ID (keeping the first)
+#   and otherwise kept in the same order as 'alltweets.csv'
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import ast
+import csv
+import json
+import uuid
+import shutil
+import numpy as np
+
+#
+# Version of the store layout -- bump this if the layout changes
+# so old stores are rebuilt
+#
+
+STORE_FORMAT = 2
+
+#
+# Columns in the store (in the same order as 'alltweets.csv')
+# and which of them hold lists of words
+#
+
+COLUMNS = ['tweet_id', 'created_at', 'text', 'words', 'stopwords', 'lemmas']
+WORD_COLUMNS = ['words', 'stopwords', 'lemmas']
+
+#
+# Utility function to turn a date string as scraped from Twitter
+# into a NumPy datetime
+#
+# Twitter dates look like '2021-04-05 12:34:56' and may have a
+# timezone ('+00:00') on the end which we drop since all dates
+# are in UTC
+#
+
+def parse_date(created_at):
+
+    return np.datetime64(created_at[:19].replace(' ', 'T'), 's')
+
+#
+# Write a store
+#
+# Function takes two arguments:
+#
+# path: the store directory (it will be replaced if it exists)
+#
+# rows: a list of tweets where each tweet is a list holding
+# the tweet ID, publication date, cleansed text, and lists of
+# words, words excluding stopwords and lemmas (the same six
+# data points 'clean.py' writes to 'alltweets.csv')
+#
+
+def write_store(path, rows):
+
+    #
+    # Deduplicate on tweet ID keeping the first copy of each tweet
+    #
+
+    seen = set()
+    unique = []
+
+    for row in rows:
+        if int(row[0]) not in seen:
+            seen.add(int(row[0]))
+            unique.append(row)
+
+    #
+    # Write into a temporary directory first so a failed write never
+    # leaves a half-written store behind
+    #
+
+    tmppath = path.rstrip('/\\') + '.tmp/'
+
+    if os.path.exists(tmppath):
+        shutil.rmtree(tmppath)
+
+    os.makedirs(tmppath)
+
+    #
+    # Tweet IDs and publication dates
+    #
+
+    created_at = np.array([parse_date(row[1]) for row in unique], dtype='datetime64[s]')
+
+    np.save(tmppath + 'tweet_id.npy', np.array([int(row[0]) for row in unique], dtype=np.int64))
+    np.save(tmppath + 'created_at.npy', created_at)
+
+    #
+    # Date index -- a stable sort keeps tweets with the same date in
+    # store order
+    #
+
+    order = np.argsort(created_at, kind='stable')
+
+    np.save(tmppath + 'date_order.npy', order)
+    np.save(tmppath + 'date_sorted.npy', created_at[order])
+
+    #
+    # Tweet text as one block of UTF-8 bytes plus offsets
+    #
+
+    encoded = [str(row[2]).encode('utf-8') for row in unique]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded], out=offsets[1:])
+
+    with open(tmppath + 'text.bin', 'wb') as f:
+        f.write(b''.join(encoded))
+
+    np.save(tmppath + 'text_offsets.npy', offsets)
+
+    #
+    # Word columns as vocabulary numbers plus offsets -- all three
+    # columns share one vocabulary
+    #
+
+    vocab = {}
+
+    for position, column in enumerate(WORD_COLUMNS, start=3):
+        ids = [vocab.setdefault(word, len(vocab)) for row in unique for word in row[position]]
+        offsets = np.zeros(len(unique) + 1, dtype=np.int64)
+        np.cumsum([len(row[position]) for row in unique], out=offsets[1:])
+
+        np.save(tmppath + column + '_ids.npy', np.array(ids, dtype=np.int32))
+        np.save(tmppath + column + '_offsets.npy', offsets)
+
+    np.save(tmppath + 'vocab.npy', np.array(list(vocab), dtype=str))
+
+    #
+    # Write the metadata last, then swap the new store into place
+    #
+
+    with open(tmppath + 'meta.json', 'w') as f:
+        json.dump({'format': STORE_FORMAT, 'rows': len(unique), 'build': uuid.uuid4().hex}, f)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+    os.rename(tmppath, path)
+
+#
+# Build a store from a deduplicated tweets CSV
+#
+# This lets projects cleaned before the store existed use it
+# without cleaning again
+#
+# Function takes two arguments:
+#
+# path: the store directory
+#
+# csvpath: the path to the 'alltweets_dedup.csv' (or
+# 'alltweets.csv') file
+#
+
+def build_from_csv(path, csvpath):
+
+    rows = []
+
+    with open(csvpath, newline='') as csvfile:
+
+        reader = csv.DictReader(csvfile)
+
+        #
+        # The word columns were written as Python lists so we read
+        # them back into lists
+        #
+
+        for row in reader:
+            rows.append([row['tweet_id'], row['created_at'], row['text']] +
+                        [ast.literal_eval(row[column]) for column in WORD_COLUMNS])
+
+    write_store(path, rows)
+
+#
+# Open a project's store
+#
+# Function takes one argument:
+#
+# analysispath: the project's 'analysis' directory
+#
+# If the store does not exist yet (or has an old layout) it is
+# built from 'alltweets_dedup.csv'
+#
+# The function returns a dictionary describing the store which
+# is passed to the other functions in this module
+#
+
+def open_store(analysispath):
+
+    path = analysispath + 'store/'
+
+    meta = None
+
+    if os.path.exists(path + 'meta.json'):
+        with open(path + 'meta.json') as f:
+            meta = json.load(f)
+
+    if meta is None or meta['format'] != STORE_FORMAT:
+        print('Building tweet store from alltweets_dedup.csv')
+        build_from_csv(path, analysispath + 'alltweets_dedup.csv')
+
+        with open(path + 'meta.json') as f:
+            meta = json.load(f)
+
+    return {'path': path, 'rows': meta['rows'], 'build': meta.get('build')}
+
+#
+# Utility function to load one of the store's arrays memory-mapped
+#
+
+def load_array(st, name):
+
+    return np.load(st['path'] + name + '.npy', mmap_mode='r')
+
+#
+# Find the tweets published in a period
+#
+# Function takes two arguments:
+#
+# st: a store opened with 'open_store'
+#
+# year: the period as YYYY or YYYY-MM (or None for all tweets)
+#
+# The function returns a NumPy array of the row numbers of the
+# matching tweets in store order
+#
+
+def select(st, year=None):
+
+    if year is None:
+        return np.arange(st['rows'])
+
+    #
+    # A period such as '2021' or '2021-04' becomes a NumPy datetime
+    # with a unit of a year or a month so adding one gives us the
+    # start of the next period
+    #
+
+    start = np.datetime64(year)
+    end = (start + 1).astype('datetime64[s]')
+    start = start.astype('datetime64[s]')
+
+    #
+    # Binary search the sorted dates for where the period starts and
+    # ends -- the tweets in between are the ones we want so the work
+    # grows with the size of the period rather than the project
+    #
+
+    dates = load_array(st, 'date_sorted')
+
+    first = np.searchsorted(dates, start, side='left')
+    last = np.searchsorted(dates, end, side='left')
+
+    #
+    # Put the matching tweets back in store order
+    #
+
+    return np.sort(load_array(st, 'date_order')[first:last])
+
+#
+# Read a column for a set of tweets
+#
+# Function takes three arguments:
+#
+# st: a store opened with 'open_store'
+#
+# column: the name of the column to read
+#
+# rows: a NumPy array of row numbers (from 'select')
+#
+# The function returns a NumPy array for 'tweet_id' and
+# 'created_at', a list of strings for 'text' and a list of
+# lists of words for the word columns
+#
+
+def read_column(st, column, rows):
+
+    if column in ['tweet_id', 'created_at']:
+        return np.asarray(load_array(st, column)[rows])
+
+    if column == 'text':
+        offsets = load_array(st, 'text_offsets')
+        blob = np.memmap(st['path'] + 'text.bin', dtype=np.uint8, mode='r') if offsets[-1] > 0 else b''
+
+        return [bytes(blob[offsets[row]:offsets[row + 1]]).decode('utf-8') for row in rows]
+
+    #
+    # Word columns: gather the vocabulary numbers of the chosen
+    # tweets, look up only the distinct ones we need, and split
+    # them back into one list per tweet
+    #
+
+    ids = load_array(st, column + '_ids')
+    offsets = load_array(st, column + '_offsets')
+
+    starts = offsets[rows]
+    ends = offsets[np.asarray(rows) + 1]
+
+    if len(rows) == 0 or (ends - starts).sum() == 0:
+        return [[] for row in rows]
+
+    chosen = np.concatenate([ids[start:end] for start, end in zip(starts, ends)])
+    distinct, inverse = np.unique(chosen, return_inverse=True)
+
+    vocab = load_array(st, 'vocab')[distinct].tolist()
+    tokens = [vocab[i] for i in inverse.tolist()]
+
+    words = []
+    position = 0
+
+    for length in (ends - starts).tolist():
+        words.append(tokens[position:position + length])
+        position += length
+
+    return words
+
+#
+# Load columns from a project's store
+#
+# Function takes three arguments:
+#
+# analysispath: the project's 'analysis' directory
+#
+# columns: the list of columns to load
+#
+# year: the period as YYYY or YYYY-MM (or None for all tweets)
+#
+# The function returns a dictionary with an entry for each
+# column holding the values for the tweets in the period in
+# store order (see 'read_column')
+#
+
+def load(analysispath, columns, year=None):
+
+    st = open_store(analysispath)
+    rows = select(st, year)
+
+    return {column: read_column(st, column, rows) for column in columns}
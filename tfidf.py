@@ -16,6 +16,20 @@
 #   Processes cleansed tweet .csv files in order to take tweet
 #   data and perform TF-IDF analysis
 #
+#   The terms and their IDF are worked out from the per-month
+#   term counts and document frequencies kept by 'clean.py'
+#   (see 'cubes.py') so only the tweets in the target year are
+#   read and the vectoriser isn't fitted on them again
+#
+#   The weights are kept as a sparse matrix and saved in
+#   compact binary files (see 'weighting.py') -- with the
+#   '--top K' option each tweet's K highest weighted terms are
+#   also written to 'tfidf_<YYYY or YYYY-MM>_top.csv'
+#
+#   With the '--chunk N' option tweets are read, weighted and
+#   written out N at a time for corpora too large to hold in
+#   memory -- the results are the same
+#
 #   Make sure 'dedup.py' has been run on your project's tweet
 #   data before calling this script
 #
@@ -47,10 +61,10 @@
 #
 ################################################################
 
-import csv
-import pandas as pd
-from nltk.corpus import stopwords
-from sklearn.feature_extraction.text import TfidfVectorizer
+import cleaner
+import weighting
+import cubes
+import store
 import config
 
 #
@@ -61,73 +75,75 @@ import config
 # The 'analysis' subdirectory stores various data files generated
 # in the analysis process including generated graphs etc
 #
+# The 'cache' subdirectory stores data kept between runs to save
+# work
+#
 
 analysispath = config.basepath + project['key'] + '/analysis/'
+cachepath = config.basepath + project['key'] + '/cache/'
 
 #
-# Variables to hold data that we need:
-#
-# tweets: a list of all tweet content
+# Open the project's tweet store and find the tweets in the target
+# year
 #
 
-tweets = []
+st = store.open_store(analysispath)
+rows = store.select(st, year)
 
 #
-# Open 'alltweets_dedup.csv' for reading
+# Get the number of tweets to weight at a time -- with the '--chunk N'
+# option the tweets are read and weighted N at a time so memory use
+# stays the same however many tweets there are, otherwise they are
+# all weighted in one go
 #
 
-with open(analysispath + 'alltweets_dedup.csv', newline='') as csvfile:
-
-    #
-    # Read the contents of the file into a CSV DictReader
-    #
-
-    reader = csv.DictReader(csvfile)
+chunk = int(options.get('chunk', 0))
 
-    #
-    # Iterate through the rows
-    #
-
-    for row in reader:
-
-        #
-        # Check if the tweet's date is in the target year
-        #
-
-        if row['created_at'].startswith(year):
+#
+# The same limit applies to counting the tweets of any month whose term
+# tables need updating (see 'cubes.py')
+#
 
-            #
-            # Add the tweet's text to the tweets list
-            #
+batch = chunk if chunk > 0 else cubes.BATCH_SIZE
 
-            tweets.append(row['text'])
+if chunk <= 0:
+    chunk = max(len(rows), 1)
 
 #
-# Download stopwords from NLTK - we need them for TF-IDF analysis
+# Get the stopwords (NLTK English stopwords plus the project's custom
+# stopwords) - we need them for TF-IDF analysis
 #
 
-stopwords_en = stopwords.words('english')
+stopwords_en = cleaner.get_stopwords(project, cachepath + 'stopwords.json')
 
 #
-# Create TF-IDF vectoriser
+# Get the number of tweets in the target year and the count and
+# document frequency of every term from the per-month term tables
 #
 
-vectorizer = TfidfVectorizer(max_features=2000, min_df=5, max_df=0.7, stop_words=stopwords_en)
+count, table = cubes.load_terms(analysispath, cachepath + 'cubes/', year, batch)
 
 #
-# Perform TF-IDF on the tweets using the vectoriser
+# Choose the terms and work out their IDF with the same settings we
+# have always given the TF-IDF vectoriser -- at most 2000 terms, each
+# in at least 5 tweets and at most 70% of them
 #
 
-tfidf = vectorizer.fit_transform(tweets).toarray()
+terms, idf = weighting.fit_idf(count, table, stopwords_en, max_features=2000, min_df=5, max_df=0.7)
 
 #
-# Create a DataFrame from the results
+# Perform TF-IDF on the tweets -- the weights come back as a sparse
+# matrix with one row per tweet for each chunk which we keep as it is
+# since most tweets only contain a handful of the terms
 #
 
-tfidf_df = pd.DataFrame(tfidf, columns=vectorizer.get_feature_names())
+tfidf = weighting.weight_batches(st, rows, terms, idf, chunk)
 
 #
-# Output the DataFrame to a CSV
+# Output the sparse matrix, terms and tweet IDs as each chunk is
+# weighted and, if asked for, each tweet's highest weighted terms
 #
 
-tfidf_df.to_csv(analysispath + 'tfidf_' + year + '.csv')
\ No newline at end of file
+top = int(options['top']) if 'top' in options else None
+
+weighting.save_weights(analysispath + 'tfidf_' + year, tfidf, terms, top)
\ No newline at end of file
@@ -0,0 +1,270 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: tokenise.py
+#
+#   spaCy lemma stream used by 'compare.py' and 'sentiment.py'
+#   -- turns the tweets of a period into one list of lemmas
+#   (leaving out stopwords and single characters) in
+#   chronological order
+#
+#   Tweets are streamed through spaCy's 'nlp.pipe' in batches
+#   one tweet per document rather than glued into one huge
+#   document, so there is no limit on the size of the corpus,
+#   and the parser and named entity recogniser (which the
+#   lemmas don't need) are not loaded
+#
+#   The lemmas of each period are cached in the 'corpora'
+#   subdirectory of the project's 'cache' directory
+#   (<period>.npz) so 'compare.py' and 'sentiment.py' only run
+#   spaCy over a period once -- the cache is used as long as
+#   the tweets in the period, the spaCy model and version and
+#   the way the lemmas are chosen are all the same
+#
+#   To use spaCy this way we first need to prepare for it:
+#
+#   1. Install spacy, for instance:
+#
+#      conda install spacy
+#
+#   2. At the command prompt download the en_core_web_sm data
+#      set:
+#
+#      python -m spacy download en_core_web_sm
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import re
+import json
+import hashlib
+import multiprocessing
+import numpy as np
+import spacy
+import store
+import files
+
+#
+# The spaCy model and the components we don't need
+#
+
+SPACY_MODEL = 'en_core_web_sm'
+SPACY_EXCLUDE = ['parser', 'ner']
+
+#
+# How lemmas are chosen -- part of the key of cached corpora so
+# change this description if 'lemma_stream' changes
+#
+
+LEMMA_FILTER = {'pattern': r'\W+', 'lowercase': True, 'stopwords': 'spacy is_stop', 'min_length': 2}
+
+#
+# Number of tweets to pass to spaCy at a time
+#
+
+BATCH_SIZE = 1000
+
+#
+# The spaCy pipeline -- loaded the first time it is needed
+#
+
+nlp = None
+
+#
+# Utility function to get the spaCy pipeline
+#
+
+def get_nlp():
+
+    global nlp
+
+    if nlp is None:
+        nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+
+    return nlp
+
+#
+# Utility function to prepare the text of each tweet for spaCy
+#
+# Tweets are given oldest first -- the store (like the CSV it
+# replaced) has them in reverse chronological order -- with runs of
+# characters which aren't word characters turned into a space and
+# the text lowercased
+#
+
+def prepare_texts(texts):
+
+    for text in reversed(texts):
+        yield re.sub(r'\W+', ' ', str(text)).lower().strip()
+
+#
+# Turn tweets into a stream of lemmas
+#
+# Function takes three arguments:
+#
+# texts: a list of tweet texts in store order
+#
+# n_process: the number of processes spaCy should use (more than one
+# is only used where worker processes can be forked, see
+# 'parallel.py')
+#
+# batch_size: the number of tweets to pass to spaCy at a time
+#
+# The function returns a list of the lemmas of every word in the
+# tweets which is not a stopword and is longer than one character
+#
+
+def lemma_stream(texts, n_process=1, batch_size=BATCH_SIZE):
+
+    nlp = get_nlp()
+
+    if n_process > 1 and multiprocessing.get_start_method() != 'fork':
+        n_process = 1
+
+    corpus = []
+
+    for doc in nlp.pipe(prepare_texts(texts), batch_size=batch_size, n_process=n_process):
+        corpus.extend(w.lemma_ for w in doc if nlp.vocab[w.text].is_stop == False if len(w) > 1)
+
+    return corpus
+
+#
+# Utility function to work out the key of a cached corpus
+#
+# The key is a hash of the IDs and text of the tweets and the spaCy
+# model, version and settings used
+#
+
+def corpus_key(ids, texts):
+
+    h = hashlib.sha256()
+
+    h.update(json.dumps({'model': SPACY_MODEL,
+                         'model_version': spacy.util.get_package_version(SPACY_MODEL),
+                         'spacy': spacy.__version__,
+                         'exclude': SPACY_EXCLUDE,
+                         'filter': LEMMA_FILTER}).encode('utf-8'))
+
+    h.update(np.asarray(ids, dtype=np.int64).tobytes())
+
+    for text in texts:
+        h.update(text.encode('utf-8') + b'\n')
+
+    return h.hexdigest()
+
+#
+# Get the text of a project's tweets in a period and the key of
+# their corpus
+#
+# Function takes two arguments:
+#
+# analysispath: the project's 'analysis' directory
+#
+# year: the period as YYYY or YYYY-MM
+#
+# The function returns a tuple of the key (see 'corpus_key') and
+# the list of texts in store order -- anything worked out from
+# the period's corpus can be cached against this key
+#
+
+def period_texts(analysispath, year):
+
+    st = store.open_store(analysispath)
+    rows = store.select(st, year)
+
+    texts = store.read_column(st, 'text', rows)
+
+    return corpus_key(store.read_column(st, 'tweet_id', rows), texts), texts
+
+#
+# Get the lemma stream of a project's tweets in a period
+#
+# Function takes five arguments:
+#
+# analysispath: the project's 'analysis' directory
+#
+# corpuspath: the directory holding the project's cached corpora
+#
+# year: the period as YYYY or YYYY-MM
+#
+# n_process: the number of processes spaCy should use
+#
+# period: the key and texts of the period if the caller already
+# has them from 'period_texts' (defaults to 'None' to read them
+# from the store)
+#
+# The lemmas are loaded from the cache if they are there (and
+# still match the tweets) otherwise they are worked out with
+# 'lemma_stream' and cached
+#
+# The function returns a list of lemmas as 'lemma_stream' does
+#
+
+def load_corpus(analysispath, corpuspath, year, n_process=1, period=None):
+
+    key, texts = period if period is not None else period_texts(analysispath, year)
+
+    filename = corpuspath + year + '.npz'
+
+    if os.path.exists(filename):
+
+        with np.load(filename) as cached:
+
+            #
+            # Look each lemma up in the vocabulary as a list rather than
+            # indexing the array, which would build a fixed-width array
+            # of the whole stream padded to the longest lemma
+            #
+
+            if str(cached['key']) == key:
+                vocab = cached['vocab'].tolist()
+                return [vocab[i] for i in cached['ids'].tolist()]
+
+    corpus = lemma_stream(texts, n_process)
+
+    #
+    # Save the lemmas as a vocabulary and the position of each lemma
+    # in it -- the vocabulary is built with a dictionary so only the
+    # distinct lemmas go into an array
+    #
+
+    vocab = {}
+    ids = np.array([vocab.setdefault(lemma, len(vocab)) for lemma in corpus], dtype=np.int32)
+
+    os.makedirs(corpuspath, exist_ok=True)
+
+    files.write_binary(filename, lambda f: np.savez(f, key=np.array(key), vocab=np.array(list(vocab), dtype=str), ids=ids))
+
+    return corpus
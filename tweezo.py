@@ -79,6 +79,15 @@ if (use_recipe == 'Y'):
     my_recipe = input('Which recipe do you want to use? ')
     recipe = config.recipes[my_recipe]
 
+    #
+    # Get any options set in the recipe
+    #
+
+    options = {}
+
+    if ('options' in recipe):
+        options = dict(recipe['options'])
+
     print()
 
     #
@@ -141,6 +150,15 @@ if (use_recipe == 'Y'):
 
         shift.append(recipe['project2'])
 
+    #
+    # If we have a list of projects to compare (for 'compare-all') keep
+    # them in their own list (so a recipe can also set 'project2' for
+    # 'compare') -- the recipe's project comes first
+    #
+
+    if ('projects' in recipe):
+        projects = [project['key']] + list(recipe['projects'])
+
     #
     # Loop through list of actions and perform them
     #
@@ -197,6 +215,7 @@ else:
     print('"tfidf": TF-IDF analysis')
     print('"sentiment": Sentiment analysis')
     print('"compare": Perform comparison analysis on tweets in two projects')
+    print('"compare-all": Perform comparison analysis on tweets in every pair of a list of projects')
     print('"embeds": Perform word embedding analysis')
 
     print()
@@ -209,6 +228,12 @@ else:
 
     print()
 
+    #
+    # Create object to hold options for the action
+    #
+
+    options = {}
+
     #
     # Define project object for dependent scripts
     #
@@ -259,6 +284,36 @@ else:
 
         shift.append(input('Which project do you want to use for comparison? '))
 
+    #
+    # If the action is "compare-all" we need a list of projects to
+    # compare with:
+    #
+
+    if (my_action in ['compare-all']):
+
+        #
+        # Print list of defined projects excluding the project already
+        # selected above
+        #
+
+        print()
+
+        print('Choose the projects to compare ' + my_project + ' with:')
+        print()
+
+        for project_key in config.projects:
+            if my_project != project_key:
+                print(project_key)
+
+        print()
+
+        #
+        # Get user's choice of projects (separated by spaces) and store
+        # them in the projects list after the selected project
+        #
+
+        projects = [project['key']] + input('Which projects do you want to use for comparison (separated by spaces)? ').split()
+
     #
     # If the action is one of the following then ask the user what year
     # (or year and month) of tweets they want to analyse -- to reduce
@@ -269,10 +324,11 @@ else:
     # tfidf
     # sentiment
     # compare
+    # compare-all
     # embeds
     #
 
-    if (my_action in ['wordcount','tfidf','sentiment','compare','embeds']):
+    if (my_action in ['wordcount','tfidf','sentiment','compare','compare-all','embeds']):
         print()
         year = input('What year (or year-month) do you want to analyse (YYYY or YYYY-MM)? ')
 
@@ -307,6 +363,17 @@ else:
 
         metric = input('Which timeseries analysis do you wish to perform? ')
 
+    #
+    # If the action is "clean", ask the user whether to clean every
+    # raw file or only the ones which are new or have changed since
+    # the last clean
+    #
+
+    if (my_action in ['clean']):
+        print()
+        if input('Only clean new or changed raw files (Y or N)? ') == 'Y':
+            options['incremental'] = True
+
     #
     # Execute action on project
     #
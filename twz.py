@@ -27,17 +27,55 @@
 #   action:
 #
 #   3. YYYY or YYYY-MM to limit the analysis range (for
-#      'compare', 'embeds', 'sentiment', 'wordcount' and
-#      'tfidf' actions only)
+#      'compare', 'compare-all', 'embeds', 'sentiment',
+#      'wordcount' and 'tfidf' actions only)
 #
 #   4. Second project for comparison (for 'compare' action
-#      only
+#      only -- for the 'compare-all' action, the other
+#      projects to compare as any number of arguments)
 #
 #   5. Threshold for network graph (for 'embeds' action only)
 #
 #   6. 'valence', 'arousal' or 'dominance' to specify the
 #      timeseres to plot (for 'sentiment' action only)
 #
+#   Options can be given anywhere after the action as arguments
+#   starting with '--' and are passed to the scripts in the
+#   'options' object:
+#
+#   --incremental: only clean raw files which are new or have
+#     changed since the last clean (for 'clean' action only)
+#
+#   --workers N: number of worker processes to use (for
+#     'clean', 'compare', 'compare-all', 'embeds', 'sentiment'
+#     and 'wordcount' actions only)
+#
+#   --no-plots: only write data files and don't render any
+#     graphs (for 'compare', 'compare-all', 'embeds',
+#     'sentiment' and 'wordcount' actions only)
+#
+#   --data-only: save the shift scores of every word as .csv
+#     files instead of drawing shift graphs (for 'compare' and
+#     'compare-all' actions only)
+#
+#   --top K: also output each tweet's K highest weighted terms
+#     (for 'tfidf' action only)
+#
+#   --chunk N: weight and output N tweets at a time to limit
+#     memory use (for 'tfidf' action only)
+#
+#   --ann: find similar words with the approximate engine (for
+#     'embeds' action only) -- '--ann-tables T' and '--ann-bits B'
+#     set its number of hash tables (by default enough to expect
+#     to find 90% of the pairs) and bits per hash and
+#     '--ann-recall' reports how it compares with the exact engine
+#
+#   --dump: also write every word pair and its similarity to a
+#     compressed file (for 'embeds' action only)
+#
+#   --knn K: only keep each word's K most similar links in the
+#     network graph (for 'embeds' action only)
+#
 #   This should be the only script you need to directly run and
 #   the other scripts will not run unless invoked from this
 #   script as this script sets up some key variables the other
@@ -67,11 +105,42 @@
 import sys
 import config
 
+#
+# Take the options (arguments starting with '--') out of the list of
+# arguments and store them in the 'options' object -- an option given
+# as '--name=value' is stored with its value and an option given as
+# '--name' is stored as True
+#
+# Options which always take a value (listed in 'valued') can also be
+# given as '--name value'
+#
+# The remaining arguments are kept in order in 'args' where args[0] is
+# the script name
+#
+
+valued = ['workers', 'top', 'chunk', 'ann-tables', 'ann-bits', 'knn']
+
+options = {}
+args = []
+
+argv = list(sys.argv)
+
+while len(argv) > 0:
+    arg = argv.pop(0)
+    if arg.startswith('--'):
+        name, equals, value = arg[2:].partition('=')
+        if equals == '' and name in valued and len(argv) > 0:
+            value = argv.pop(0)
+            equals = '='
+        options[name] = value if equals else True
+    else:
+        args.append(arg)
+
 #
 # Get the action (first argument)
 #
 
-my_action = sys.argv[1]
+my_action = args[1]
 
 #
 # If the action is 'recipe' then process the recipe otherwise
@@ -84,7 +153,15 @@ if (my_action == 'recipe'):
     # Get the recipe
     #
 
-    recipe = config.recipes[sys.argv[2]]
+    recipe = config.recipes[args[2]]
+
+    #
+    # Add any options set in the recipe (options on the command line
+    # take precedence)
+    #
+
+    if ('options' in recipe):
+        options = dict(recipe['options'], **options)
 
     #
     # Get the project
@@ -145,6 +222,15 @@ if (my_action == 'recipe'):
 
         shift.append(recipe['project2'])
 
+    #
+    # If we have a list of projects to compare (for 'compare-all') keep
+    # them in their own list (so a recipe can also set 'project2' for
+    # 'compare') -- the recipe's project comes first
+    #
+
+    if ('projects' in recipe):
+        projects = [project['key']] + list(recipe['projects'])
+
     #
     # Loop through list of actions and perform them
     #
@@ -170,7 +256,7 @@ else:
     # Get the project (second argument)
     #
 
-    my_project = sys.argv[2]
+    my_project = args[2]
 
     #
     # Define project object for dependent scripts
@@ -189,11 +275,12 @@ else:
     # tfidf
     # sentiment
     # compare
+    # compare-all
     # embeds
     #
 
-    if (my_action in ['wordcount','tfidf','sentiment','compare','embeds']):
-        year = sys.argv[3]
+    if (my_action in ['wordcount','tfidf','sentiment','compare','compare-all','embeds']):
+        year = args[3]
 
     #
     # If the action is "compare" we need a project to compare to (fourth
@@ -217,7 +304,15 @@ else:
         # Get user's choice of comparison project and store in shift list
         #
 
-        shift.append(sys.argv[4])
+        shift.append(args[4])
+
+    #
+    # If the action is "compare-all" the projects to compare with are
+    # the remaining arguments (fourth onwards)
+    #
+
+    if (my_action in ['compare-all']):
+        projects = [project['key']] + args[4:]
 
     #
     # If the action is "embeds", get the threshold
@@ -226,7 +321,7 @@ else:
     #
 
     if (my_action in ['embeds']):
-        thres = float(sys.argv[4])
+        thres = float(args[4])
 
     #
     # If the action is "sentiment", get the metric for the timeseries
@@ -234,7 +329,7 @@ else:
     #
 
     if (my_action in ['sentiment']):
-        metric = sys.argv[4]
+        metric = args[4]
 
     #
     # Execute action on project
@@ -0,0 +1,194 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: vectorcache.py
+#
+#   Per-project cache of word vectors used by 'embeds.py' so the
+#   Google News word2vec model (3 million words, several GB) is
+#   not loaded for every run just to look up a few thousand
+#   words
+#
+#   The cache lives in the 'vectors' subdirectory of the
+#   project's 'cache' directory and holds the vectors of the
+#   lemmas used in the project's tweets only:
+#
+#   - vectors.npy: one word vector per row (read memory-mapped)
+#
+#   - index.json: the model the vectors came from, the word of
+#     each row, and the lemmas we have looked up which are not
+#     in the model
+#
+#   When new lemmas turn up (after cleaning new tweets) the
+#   model is loaded once to look them up and their vectors are
+#   added to the cache
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import json
+import numpy as np
+import store
+import files
+
+#
+# The word2vec model we take word vectors from
+#
+
+MODEL_NAME = 'word2vec-google-news-300'
+
+#
+# Utility function to load a cache's index
+#
+# The function returns the index (an empty one if the cache does
+# not exist yet or holds vectors from another model)
+#
+
+def load_index(cachepath):
+
+    index = None
+
+    if os.path.exists(cachepath + 'index.json'):
+        with open(cachepath + 'index.json') as f:
+            index = json.load(f)
+
+    if index is None or index['model'] != MODEL_NAME:
+        index = {'model': MODEL_NAME, 'size': 0, 'words': [], 'missing': []}
+
+    return index
+
+#
+# Get every lemma used in a project's tweets
+#
+# Function takes one argument:
+#
+# analysispath: the project's 'analysis' directory
+#
+# The function returns a sorted list of lemmas
+#
+
+def project_lemmas(analysispath):
+
+    st = store.open_store(analysispath)
+
+    ids = np.unique(store.load_array(st, 'lemmas_ids'))
+
+    return sorted(store.load_array(st, 'vocab')[ids].tolist())
+
+#
+# Add any new words to a cache
+#
+# Function takes two arguments:
+#
+# cachepath: the cache directory
+#
+# words: a list of words the cache should cover
+#
+# The model is only loaded if some of the words have never been
+# looked up
+#
+
+def update_cache(cachepath, words):
+
+    index = load_index(cachepath)
+
+    known = set(index['words']) | set(index['missing'])
+    new = [word for word in words if word not in known]
+
+    if len(new) == 0:
+        return
+
+    print('Looking up ' + str(len(new)) + ' new words in ' + MODEL_NAME)
+
+    import gensim.downloader as api
+
+    wordvectors = api.load(MODEL_NAME)
+
+    found = [word for word in new if word in wordvectors]
+
+    #
+    # Add the vectors of the words found to the end of the cached
+    # vectors
+    #
+    # The vectors are replaced before the index so if a run stops in
+    # between, 'vectors.npy' has rows the index doesn't know about --
+    # only the rows in the index are kept so each word's row still
+    # matches its vector
+    #
+
+    os.makedirs(cachepath, exist_ok=True)
+
+    if len(found) > 0:
+
+        added = np.array([wordvectors[word] for word in found], dtype=np.float32)
+
+        if len(index['words']) > 0:
+            added = np.concatenate([np.load(cachepath + 'vectors.npy', mmap_mode='r')[:len(index['words'])], added])
+
+        files.write_binary(cachepath + 'vectors.npy', lambda f: np.save(f, added))
+
+    index['size'] = wordvectors.vector_size
+    index['words'] = index['words'] + found
+    index['missing'] = sorted(set(index['missing']) | (set(new) - set(found)))
+
+    files.write_json(cachepath + 'index.json', index)
+
+#
+# Get the vectors of a list of words from a cache
+#
+# Function takes two arguments:
+#
+# cachepath: the cache directory
+#
+# words: a list of words (which should have been added to the
+# cache with 'update_cache')
+#
+# The function returns a tuple of the list of the words which
+# are in the model (in the same order as 'words') and a NumPy
+# array of their vectors (one per row)
+#
+
+def load_vectors(cachepath, words):
+
+    index = load_index(cachepath)
+
+    rows = {word: row for row, word in enumerate(index['words'])}
+    found = [word for word in words if word in rows]
+
+    if len(found) == 0:
+        return found, np.zeros((0, index['size']), dtype=np.float32)
+
+    vectors = np.load(cachepath + 'vectors.npy', mmap_mode='r')
+
+    return found, np.asarray(vectors[[rows[word] for word in found]])
@@ -0,0 +1,321 @@
+################################################################
+#
+#   TWEEZO - A set of utility scripts for scraping tweets,
+#   processing them and performing analysis
+#
+#   Developed to support a series of labs and assignments for
+#   the CEU Digital Tools course for BA students in the
+#   2021-21 academic year.
+#
+#   By Ethan Danesh
+#
+################################################################
+#
+#   Module: weighting.py
+#
+#   TF-IDF for 'tfidf.py' -- working out the terms and their
+#   inverse document frequencies (IDF) for a period from the
+#   per-month term tables kept by 'cubes.py', weighting tweets
+#   with them, and saving the results without ever turning the
+#   sparse matrix of weights into a dense table
+#
+#   The terms and weights are exactly those the SciKit-Learn
+#   TfidfVectorizer would give if fitted on the tweets of the
+#   period, but the vocabulary and IDF come from stored counts
+#   so only the tweets being weighted are read
+#
+#   The results for a period are written to the project's
+#   'analysis' directory:
+#
+#   - tfidf_<period>.npz: the matrix of weights (one row per
+#     tweet and one column per term) as a SciPy sparse matrix
+#     which can be read with 'scipy.sparse.load_npz'
+#
+#   - tfidf_<period>_terms.txt: the term of each column, one
+#     per line
+#
+#   - tfidf_<period>_tweets.txt: the tweet ID of each row, one
+#     per line
+#
+#   - tfidf_<period>_top.csv (optional): each tweet's highest
+#     weighted terms
+#
+#   This module is imported by other scripts and should not be
+#   run directly
+#
+################################################################
+#
+#   Copyright 2021, Ethan Danesh
+#
+#   Licensed under the Apache License, Version 2.0 (the
+#   "License"); you may not use this file except in compliance
+#   with the License.
+#
+#   You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing,
+#   software distributed under the License is distributed on an
+#   "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+#   either express or implied. See the License for the specific
+#   language governing permissions and limitations under the
+#   License.
+#
+################################################################
+
+import os
+import csv
+import numbers
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+import store
+
+#
+# Work out the terms and IDF for a period
+#
+# Function takes six arguments:
+#
+# tweets: the number of tweets in the period
+#
+# table: a dictionary of terms with a list of how many times each
+# appears and how many tweets it appears in (from
+# 'cubes.load_terms')
+#
+# stopwords_en: the set of stopwords to leave out
+#
+# max_features, min_df, max_df: the vectoriser settings -- only
+# terms in at least min_df and at most max_df tweets are kept
+# (as a number of tweets or, if a float, a proportion of the
+# tweets) and then only the max_features most frequent
+#
+# The terms are chosen exactly as TfidfVectorizer chooses them
+# (including how it breaks ties between terms with the same
+# count) and the IDF uses its smoothed formula:
+#
+# idf = ln((1 + tweets) / (1 + document frequency)) + 1
+#
+# The function returns a tuple of the list of terms in
+# alphabetical order and a NumPy array of their IDF
+#
+
+def fit_idf(tweets, table, stopwords_en, max_features=None, min_df=1, max_df=1.0):
+
+    terms = sorted(term for term in table if term not in stopwords_en)
+
+    counts = np.array([table[term][0] for term in terms], dtype=np.int64)
+    docs = np.array([table[term][1] for term in terms], dtype=np.int64)
+
+    high = max_df if isinstance(max_df, numbers.Integral) else max_df * tweets
+    low = min_df if isinstance(min_df, numbers.Integral) else min_df * tweets
+
+    if high < low:
+        raise ValueError('max_df corresponds to < documents than min_df')
+
+    mask = (docs <= high) & (docs >= low)
+
+    #
+    # Keep the most frequent terms -- sorting the counts of the
+    # terms left in alphabetical order just as the vectoriser does
+    # so terms with the same count are chosen the same way
+    #
+
+    if max_features is not None and mask.sum() > max_features:
+        chosen = (-counts[mask]).argsort()[:max_features]
+        limited = np.zeros(len(mask), dtype=bool)
+        limited[np.where(mask)[0][chosen]] = True
+        mask = limited
+
+    if mask.sum() == 0:
+        raise ValueError('After pruning, no terms remain. Try a lower min_df or a higher max_df.')
+
+    idf = np.log((tweets + 1) / (docs[mask].astype(np.float64) + 1)) + 1
+
+    return [term for term, keep in zip(terms, mask) if keep], idf
+
+#
+# Weight tweets with TF-IDF
+#
+# Function takes three arguments:
+#
+# texts: a list of tweet texts
+#
+# terms: the list of terms (from 'fit_idf')
+#
+# idf: the IDF of each term (from 'fit_idf')
+#
+# The function returns a sparse matrix of weights with one row
+# per tweet and one column per term, each row normalised to a
+# length of one
+#
+
+def transform(texts, terms, idf):
+
+    matrix = CountVectorizer(vocabulary=terms).transform(texts).astype(np.float64)
+    matrix.data *= idf[matrix.indices]
+
+    return normalize(matrix, norm='l2', copy=False)
+
+#
+# Weight the tweets of a period in batches
+#
+# Function takes five arguments:
+#
+# st: a store opened with 'store.open_store'
+#
+# rows: a NumPy array of the row numbers of the tweets (from
+# 'store.select')
+#
+# terms, idf: the terms and their IDF (from 'fit_idf')
+#
+# batch: the number of tweets to read and weight at a time
+#
+# The function yields a tuple of the sparse matrix of weights
+# and the list of tweet IDs for each batch -- only one batch of
+# tweet text is held in memory at a time
+#
+
+def weight_batches(st, rows, terms, idf, batch):
+
+    for start in range(0, len(rows), batch):
+
+        chosen = rows[start:start + batch]
+
+        yield transform(store.read_column(st, 'text', chosen), terms, idf), store.read_column(st, 'tweet_id', chosen).tolist()
+
+#
+# Write the highest weighted terms of each tweet
+#
+# Function takes five arguments:
+#
+# writer: a CSV writer to write rows of tweet ID, rank, term and
+# weight to
+#
+# matrix: the sparse matrix of weights
+#
+# terms: the list of terms (one per column)
+#
+# tweet_ids: the list of tweet IDs (one per row)
+#
+# k: the number of terms to write for each tweet (tweets with
+# fewer terms get fewer rows)
+#
+# Terms with the same weight are written in alphabetical order
+#
+
+def write_top_terms(writer, matrix, terms, tweet_ids, k):
+
+    matrix = sp.csr_matrix(matrix)
+    matrix.sort_indices()
+
+    #
+    # Each row's weights and columns are a slice of the matrix's
+    # data and indices so we only sort the non-zero weights
+    #
+
+    for row, tweet_id in enumerate(tweet_ids):
+
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        weights = matrix.data[start:end]
+        columns = matrix.indices[start:end]
+
+        for rank, position in enumerate(np.argsort(-weights, kind='stable')[:k], start=1):
+            writer.writerow([tweet_id, rank, terms[columns[position]], round(float(weights[position]), 6)])
+
+#
+# Save TF-IDF weights
+#
+# Function takes four arguments:
+#
+# prefix: the path of the output files without an extension (for
+# example '.../analysis/tfidf_2021')
+#
+# batches: the batches of weights as tuples of a sparse matrix
+# and the list of tweet IDs of its rows (see 'weight_batches')
+#
+# terms: the list of terms (one per column)
+#
+# k: the number of highest weighted terms of each tweet to write
+# to '<prefix>_top.csv' (or None not to write them -- any
+# '<prefix>_top.csv' from an earlier run is removed so it isn't
+# left with weights it no longer matches)
+#
+# Each batch is written out as it arrives -- the matrix is built
+# up in temporary files of its weights, columns and row starts
+# and then saved to '<prefix>.npz' straight from those files so
+# the whole matrix is never held in memory
+#
+
+def save_weights(prefix, batches, terms, k=None):
+
+    with open(prefix + '_terms.txt', 'w') as f:
+        f.writelines(term + '\n' for term in terms)
+
+    parts = {'data': np.float64, 'indices': np.int32, 'indptr': np.int64}
+    files = {part: open(prefix + '.' + part + '.tmp', 'wb') for part in parts}
+
+    tweetfile = open(prefix + '_tweets.txt', 'w')
+
+    topfile = None
+
+    if k is not None:
+        topfile = open(prefix + '_top.csv', 'w', newline='')
+        writer = csv.writer(topfile)
+        writer.writerow(['tweet_id', 'rank', 'term', 'weight'])
+    elif os.path.exists(prefix + '_top.csv'):
+        os.remove(prefix + '_top.csv')
+
+    #
+    # Write each batch -- its row starts are moved along by the
+    # number of weights already written
+    #
+
+    count = 0
+    total = 0
+
+    np.zeros(1, dtype=np.int64).tofile(files['indptr'])
+
+    for matrix, tweet_ids in batches:
+
+        matrix = sp.csr_matrix(matrix)
+        matrix.sort_indices()
+
+        matrix.data.astype(np.float64).tofile(files['data'])
+        matrix.indices.astype(np.int32).tofile(files['indices'])
+        (matrix.indptr[1:].astype(np.int64) + total).tofile(files['indptr'])
+
+        count += matrix.shape[0]
+        total += matrix.nnz
+
+        tweetfile.writelines(str(tweet_id) + '\n' for tweet_id in tweet_ids)
+
+        if topfile is not None:
+            write_top_terms(writer, matrix, terms, tweet_ids, k)
+
+    for f in list(files.values()) + [tweetfile]:
+        f.close()
+
+    if topfile is not None:
+        topfile.close()
+
+    #
+    # Save the matrix in the same layout as 'scipy.sparse.save_npz'
+    # reading each part from its temporary file memory-mapped
+    #
+
+    arrays = {}
+
+    for part, dtype in parts.items():
+        if os.path.getsize(prefix + '.' + part + '.tmp') > 0:
+            arrays[part] = np.memmap(prefix + '.' + part + '.tmp', dtype=dtype, mode='r')
+        else:
+            arrays[part] = np.zeros(0, dtype=dtype)
+
+    np.savez_compressed(prefix + '.npz', format=np.array(b'csr'), shape=np.array([count, len(terms)]), **arrays)
+
+    del arrays
+
+    for part in parts:
+        os.remove(prefix + '.' + part + '.tmp')
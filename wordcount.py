@@ -20,6 +20,9 @@
 #   - Histogram of word counts
 #   - Word cloud
 #
+#   The graphs are rendered at the end (see 'render.py') -- with
+#   the 'no-plots' option only the word counts are written
+#
 #   Make sure 'dedup.py' has been run on your project's tweet
 #   data before calling this script
 #
@@ -51,11 +54,11 @@
 #
 ################################################################
 
-import csv
 import pandas as pd
-import collections
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud, STOPWORDS, ImageColorGenerator
+from wordcloud import STOPWORDS
+import cubes
+import render
+import plots
 import config
 
 #
@@ -66,72 +69,21 @@ import config
 # The 'analysis' subdirectory stores various data files generated
 # in the analysis process including generated graphs etc
 #
-
-analysispath = config.basepath + project['key'] + '/analysis/'
-
-#
-# Variables to hold data that we need:
-#
-# words: a list of all lemmatised terms from all tweets
+# The 'cache' subdirectory stores data kept between runs to save
+# work
 #
 
-words = []
-
-#
-# Open 'alltweets_dedup.csv' for reading
-#
-
-with open(analysispath + 'alltweets_dedup.csv', newline='') as csvfile:
-
-    #
-    # Read the contents of the file into a CSV DictReader
-    #
-
-    reader = csv.DictReader(csvfile)
-
-    #
-    # Iterate through the rows
-    #
-
-    for row in reader:
-
-        #
-        # Check if the tweet's date is in the target year
-        #
-
-        if row['created_at'].startswith(year):
-
-            #
-            # Grab the lemmas as a string of text (which is what comes from the CSV
-            # and strip out the leading [' and trailing '] so we can split in the next step
-            #
-            # In the CSV the field looked like:
-            #
-            # ['word1','word2', ... ,'wordX']
-            #
-            # So, the [-2:2] syntax gives us:
-            #
-            # word1','word2', ... ,'wordX
-            #
-
-            lemmas = row['lemmas'][2:-2]
-
-            #
-            # Split the lemmas string into a list of words using the following
-            # string to split:
-            #
-            # ','
-            #
-            # Add the words to the words list
-            #
-
-            words = words + lemmas.split('\', \'')
+analysispath = config.basepath + project['key'] + '/analysis/'
+cachepath = config.basepath + project['key'] + '/cache/'
 
 #
-# Place the words list in a collections counter to count the frequency of each word in the set
+# Get the frequency of each word in the target year as a collections
+# counter -- the counts are merged from the per-month lemma frequency
+# tables in the 'cache/cubes' subdirectory (which 'clean.py' keeps up
+# to date) rather than counted from every tweet
 #
 
-counter = collections.Counter(words)
+counter = cubes.load_counts(analysispath, cachepath + 'cubes/', year)
 
 #
 # Create a Pandas data frame with columns word and count of each word
@@ -159,28 +111,40 @@ word_counts.index = word_counts['word']
 word_counts.to_csv(analysispath + 'wordcount.csv')
 
 #
-# Generate a histogram from the word frequency counts
+# Get the number of worker processes to render graphs in (one by
+# default) and check if we are only writing data files and not
+# rendering graphs (the '--no-plots' option)
+#
+
+workers = int(options.get('workers', 1))
+no_plots = options.get('no-plots', False)
+
+#
+# Queue a histogram from the word frequency counts -- the graphs are
+# rendered at the end of the script (see 'render.py')
+#
+
+render.add_plot(plots.histogram_graph, analysispath + 'histogram_' + year + '.png', word_counts['count'])
+
+#
+# Take the word frequencies for the word cloud straight from the
+# counter -- leaving out the word cloud's own stopwords as
+# generating it from the text would. Unlike generating it from the
+# text, plurals are not merged into their singular (the lemmas are
+# mostly singular already) and pairs of words are not added
 #
 
-plt.figure(figsize=(75,50))
-word_counts['count'].plot.bar()
-plt.xlabel('Words')
-plt.ylabel('Word count')
-plt.savefig(analysispath + 'histogram_' + year + '.png')
+frequencies = {word: count for word, count in counter.items() if word.lower() not in STOPWORDS}
 
 #
-# Merge the words from the words list into a single string of text
-# with spaces separating the words
+# Queue a word cloud of max 30 words using these frequencies
 #
 
-text = " ".join(str(word) for word in words)
+render.add_plot(plots.wordcloud_graph, analysispath + 'wordcloud_' + year + '.png', frequencies)
 
 #
-# Generate a word cloud of max 30 words using this text
+# Render the queued graphs -- in parallel if we have more than one
+# worker -- unless we are only writing data files
 #
 
-wordcloud = WordCloud(max_font_size=50, max_words=30, background_color="white").generate(text)
-plt.figure()
-plt.imshow(wordcloud, interpolation="bicubic")
-plt.axis("off")
-plt.savefig(analysispath + 'wordcloud_' + year + '.png')
+render.render_plots(workers, skip=no_plots)